@@ -232,7 +232,7 @@ def run_quick_test():
             contacts = read_contacts_from_excel(excel_path)
             if contacts:
                 print(f"   ✓ Successfully read {len(contacts)} contacts")
-                print(f"   ✓ Sample contact: {contacts[0]['number']}")
+                print(f"   ✓ Sample contact: {contacts[0].number}")
                 if len(contacts) > 0:
                     print(f"   ✓ Contact data structure is correct")
                 return True
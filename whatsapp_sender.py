@@ -7,22 +7,333 @@ More reliable than pywhatkit for bulk messaging
 import openpyxl
 import time
 import os
+import random
+import re
+import json
+import traceback
+import platform
+import functools
+import itertools
+from collections import namedtuple
+import urllib.request
+import atexit
+import queue
+import threading
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.common.action_chains import ActionChains
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
+from selenium.common.exceptions import (TimeoutException, NoSuchElementException, StaleElementReferenceException,
+                                        WebDriverException)
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
 from dotenv import load_dotenv
 
+# In requirements.txt, but optional: used to clean up Chrome/ChromeDriver processes left behind by
+# earlier runs and to spot a text-only browser before an image run re-attaches to it
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
 # Load environment variables
 load_dotenv()
 
-def read_contacts_from_excel(file_path):
+# Set WA_DEBUG=1 (environment or .env) for extra diagnostic output while locating elements
+DEBUG = os.getenv("WA_DEBUG") == "1"
+
+# Set WA_HEADLESS=1 to run Chrome without a window. Only works once the profile is logged in:
+# do the first run (QR scan) without it
+HEADLESS = os.getenv("WA_HEADLESS") == "1"
+
+# Characters outside the Basic Multilingual Plane (most emoji) - ChromeDriver can't send_keys them
+NON_BMP_RE = re.compile(r'[^\u0000-\uffff]')
+
+# One row of the contacts sheet: cleaned number, final message text, optional Column D image path
+Contact = namedtuple('Contact', ['number', 'message', 'image_path'])
+
+# Formatting characters stripped from phone numbers (spaces, dashes, parentheses); '+' is kept.
+# A str.translate deletion table: one C-level pass per number
+PHONE_STRIP_TABLE = str.maketrans('', '', ' \t\r\n\u00a0-()')
+
+# Plain-text messages at least this long are inserted with one JS insertText call instead of
+# send_keys, which dispatches a key event per character
+JS_TYPING_MIN_LENGTH = 200
+
+# Chrome is started with --remote-debugging-port; a browser left open by an earlier run
+# (Ctrl+C during the closing countdown) is re-attached through it. Extra workers use the next ports.
+DEBUGGING_PORT = 9222
+
+# Contacts a worker browser sends before it is restarted (keeps a long run's Chrome memory in check)
+DRIVER_MAX_USES = 200
+
+# Chrome switch used for text-only runs; also how a browser left open by one is recognised
+IMAGES_OFF_ARG = "--blink-settings=imagesEnabled=false"
+
+# The pause between contacts is delay_seconds plus up to 20% more, so sends don't go out on a
+# perfectly regular clock; it is never shorter than the configured delay
+DELAY_JITTER = 0.2
+
+# ChromeDriver path from the last ChromeDriverManager install, with the Chrome major version it was for
+CHROMEDRIVER_CACHE_FILE = ".chromedriver_path.json"
+
+# Where the row indexes already sent are checkpointed after every send, for resuming after a crash.
+# Only used for the same Excel file, unchanged since (path, modification time and size must match)
+PROGRESS_FILE = ".progress.json"
+
+# Usual Chrome install locations on Windows, checked in order
+CHROME_PATHS = (
+    r'C:\Program Files\Google\Chrome\Application\chrome.exe',
+    r'C:\Program Files (x86)\Google\Chrome\Application\chrome.exe',
+    os.path.expanduser(r'~\AppData\Local\Google\Chrome\Application\chrome.exe'),
+)
+
+# Selectors that worked earlier in this session, keyed by purpose (e.g. 'photos_videos')
+_selector_cache = {}
+
+# Session ids of drivers known to be on a logged-in WhatsApp Web page. Set after login; dropped
+# when a send raises, so ensure_main_page only re-checks the URL after something went wrong
+_on_whatsapp_web = set()
+
+# Search query of the chat each driver currently has open (keyed by session_id). The chat stays
+# open after a send, so select_contact uses this to tell "same contact again" from "no new chat"
+_open_chat = {}
+
+# Global caption input selectors, most specific first.
+# Terms already covered by a broader term in the same union are left out; placeholder text,
+# data-tab and spellcheck are checked on the results (case-insensitively, in Python).
+CAPTION_SELECTORS = [
+    # data-tab='11' (also covers role/spellcheck/footer/media variants)
+    "//div[@contenteditable='true'][@data-tab='11']",
+    "//div[@contenteditable='true'][@data-testid='media-caption-input-container']",
+    # By placeholder - "Type a message" / caption (this is what appears below image)
+    "//div[@contenteditable='true'][@placeholder]",
+    # Look in media areas
+    "//div[contains(@data-testid, 'media')]//div[@contenteditable='true']",
+]
+
+# One union query per search instead of one find_elements per selector
+GLOBAL_CAPTION_XPATH = " | ".join(CAPTION_SELECTORS)
+
+# Image preview containers (holding the blob image) that the caption input lives under, most
+# specific first - one XPath union instead of one visible-filter query per container kind
+MEDIA_CONTAINER_XPATH = " | ".join(
+    selector + "[.//img[contains(@src, 'blob')]]" for selector in (
+        "//div[contains(@data-testid, 'media')]",
+        "//div[contains(@class, 'media')]",
+        "//div[contains(@data-testid, 'image')]",
+        "//div[contains(@class, 'preview')]",
+    )
+)
+
+# Nearest clickable ancestor of a menu entry's label or icon
+CLICKABLE_ANCESTOR_XPATH = "./ancestor::button[1] | ./ancestor::div[@role='button'][1]"
+
+# Caption input INSIDE a media container / overlay: data-tab 11, the footer box (data-tab 10
+# becomes the caption input while an image is attached) or a "Type a message" placeholder
+CAPTION_IN_CONTAINER_CSS = (
+    "div[contenteditable='true'][data-tab='11'], "
+    "footer div[contenteditable='true'][data-tab='10'], "
+    "div[contenteditable='true']:not([data-tab='3'])[placeholder*='message' i], "
+    "div[contenteditable='true']:not([data-tab='3'])[aria-placeholder*='message' i], "
+    "div[contenteditable='true']:not([data-tab='3'])[placeholder*='type' i]"
+)
+
+# Attached image preview: blob image or media container (CSS - native querySelectorAll)
+PREVIEW_CSS = "img[src*='blob'], div[data-testid*='media']"
+
+# Preview image right after upload (blob image, or an image inside a media/preview container)
+PREVIEW_IMAGE_CSS = "img[src*='blob'], div[data-testid*='media'] img, div[class*='preview'] img"
+
+# Media composer overlay preview (a dialog holding the blob image / media container)
+COMPOSER_PREVIEW_CSS = "div[role='dialog'] img[src*='blob'], div[role='dialog'] div[data-testid*='media']"
+
+# Prebuilt locators reused on every message (CSS - matched natively, no XPath evaluation)
+MESSAGE_BOX_CSS = "div[contenteditable='true'][data-tab='10']"
+ATTACH_BUTTON_CSS = (
+    "span[data-testid='clip'], div[data-testid='clip'], span[data-icon='attach'], "
+    "button[title='Attach'], button[aria-label='Attach']"
+)
+CLOSE_BUTTON_CSS = "span[data-icon='close'], button[aria-label*='Close'], button[aria-label*='Remove']"
+# Message box candidates, most specific first (see get_fresh_message_box)
+MESSAGE_BOX_SELECTORS = (
+    MESSAGE_BOX_CSS,
+    "footer div[contenteditable='true'][role='textbox']",
+    "div[contenteditable='true'][data-testid='conversation-compose-box-input']",
+    "footer div[contenteditable='true']",
+    "div[contenteditable='true'][role='textbox']:not([data-tab='3'])",
+    "div[contenteditable='true'].selectable-text:not([data-tab='3'])",
+)
+FOOTER_CSS = "footer, div[class*='footer'], div[data-testid*='conversation-compose']"
+CHAT_OPEN_CSS = "div[data-testid='conversation-header'], div[data-testid='chatlist'], div[class*='chat']"
+SEARCH_BOX_CSS = "div[contenteditable='true'][data-tab='3']"
+SEARCH_BOX_LOCATOR = (By.CSS_SELECTOR, SEARCH_BOX_CSS)
+CHAT_RESULT_CSS = "div[role='listitem']"
+FIRST_CHAT_RESULT_LOCATOR = (By.CSS_SELECTOR, CHAT_RESULT_CSS)
+
+# Conversation panel; WhatsApp Web mounts a new one for every chat it opens
+CONVERSATION_PANEL_CSS = "#main"
+
+# Outgoing message bubbles in the open chat, and the tick icons shown once the server accepted one
+OUTGOING_MESSAGE_CSS = "div.message-out"
+MESSAGE_ACK_CSS = "span[data-icon='msg-check'], span[data-icon='msg-dblcheck'], span[data-icon='msg-dblcheck-ack']"
+
+# Chat / composer send button (one CSS group instead of a list of XPaths)
+SEND_BUTTON_CSS = (
+    "span[data-testid='send'], span[data-icon='send'], "
+    "button[aria-label='Send'], div[data-testid='send']"
+)
+
+# Send button found for the current chat, keyed by contact number (validated before reuse)
+_send_button_cache = {}
+
+# Media picker <input type='file'> (accepts video, not sticker/webp)
+MEDIA_FILE_INPUT_CSS = (
+    "input[type='file'][accept*='video']"
+    ":not([accept*='sticker']):not([accept*='webp'])"
+    ":not([name*='sticker']):not([data-testid*='sticker'])"
+)
+
+# Media file input picked by send_image_with_caption, keyed by driver session id
+# (reused for the next image; re-found only if it went stale)
+_file_input_cache = {}
+
+# Media composer send button locators, relative to the overlay container, most specific first.
+# XPath is kept only where the ancestor axis is needed; the send-icon ancestors are one union
+# (evaluated once per container instead of once per icon attribute)
+MEDIA_SEND_LOCATORS = (
+    (By.CSS_SELECTOR, "button[aria-label='Send']"),
+    (By.XPATH, ".//*[@data-icon='send' or @data-testid='send']/ancestor::button[1]"),
+    (By.CSS_SELECTOR, "div[role='button']:has(span[data-icon='send'])"),
+    (By.CSS_SELECTOR, "[aria-label='Send']"),
+)
+
+# Focus, clear and type into a contenteditable (caption or chat message box) in one call.
+# Newlines are dispatched as synthetic Shift+Enter events, which WhatsApp may ignore, so multi-line
+# text in the chat box goes through set_message_text_js (real key presses) instead.
+# Arguments: (elem, text, preview_css or null). Returns {previousLength, length, previewVisible}.
+# Shared by every JS clear-and-type path so the browser compiles one script body.
+INSERT_TEXT_JS = """
+    var elem = arguments[0];
+    var text = arguments[1] || '';
+    var previousLength = (elem.textContent || '').length;
+    
+    // Scroll into view and focus (NO physical click)
+    elem.scrollIntoView({block:'center', inline:'center'});
+    elem.focus();
+    
+    // Step 1: CLEAR - select all and delete through the editor; only if that left text behind,
+    // fall back to wiping innerHTML (which bypasses the editor's own state)
+    try {
+        var range = document.createRange();
+        range.selectNodeContents(elem);
+        var selection = window.getSelection();
+        selection.removeAllRanges();
+        selection.addRange(range);
+        document.execCommand('delete', false, null);
+    } catch(e) {}
+    
+    if ((elem.textContent || '').length) {
+        try {
+            elem.innerHTML = '';
+        } catch(e) {}
+    }
+    
+    // Refocus after clearing
+    elem.focus();
+    
+    // Step 2: Insert text line by line, with Shift+Enter between lines
+    var lines = text.split('\\n');
+    for (var i = 0; i < lines.length; i++) {
+        if (i > 0) {
+            var init = {key: 'Enter', code: 'Enter', keyCode: 13, which: 13, shiftKey: true, bubbles: true, cancelable: true};
+            elem.dispatchEvent(new KeyboardEvent('keydown', init));
+            elem.dispatchEvent(new KeyboardEvent('keyup', init));
+        }
+        // Insert the line text (if not empty)
+        if (lines[i]) {
+            try {
+                document.execCommand('insertText', false, lines[i]);
+            } catch(e) {}
+        }
+    }
+    
+    elem.focus();
+    
+    // Step 3: Report the result (and whether the image preview survived) in the same round-trip
+    var previewVisible = !!arguments[2] && Array.prototype.some.call(document.querySelectorAll(arguments[2]), function(e) {
+        return e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden';
+    });
+    return {previousLength: previousLength, length: (elem.textContent || '').trim().length, previewVisible: previewVisible};
+"""
+
+# INSERT_TEXT_JS followed, in the same round-trip, by a click on the visible send button
+# (arguments[3] = send button CSS). A synthetic Enter keydown is not used: WhatsApp ignores
+# untrusted key events, while the button's click handler does run. Adds clicked to the result.
+INSERT_AND_SEND_JS = """
+    var result = (function() {""" + INSERT_TEXT_JS + """}).apply(this, arguments);
+    result.clicked = false;
+    if (result.length) {
+        var buttons = document.querySelectorAll(arguments[3]);
+        for (var i = 0; i < buttons.length; i++) {
+            if (buttons[i].getClientRects().length > 0) {
+                (buttons[i].closest('button, div[role="button"]') || buttons[i]).click();
+                result.clicked = true;
+                break;
+            }
+        }
+    }
+    return result;
+"""
+
+# Clear a contenteditable, then hand it the whole text as one synthetic paste (DataTransfer with
+# text/plain) - the editor inserts it in one go, newlines and emoji included, and the real
+# clipboard is never touched. Same arguments and return value as INSERT_TEXT_JS.
+PASTE_TEXT_JS = """
+    var elem = arguments[0];
+    var text = arguments[1] || '';
+    var previousLength = (elem.textContent || '').length;
+    
+    elem.scrollIntoView({block:'center', inline:'center'});
+    elem.focus();
+    try {
+        var range = document.createRange();
+        range.selectNodeContents(elem);
+        var selection = window.getSelection();
+        selection.removeAllRanges();
+        selection.addRange(range);
+        document.execCommand('delete', false, null);
+    } catch(e) {}
+    
+    var data = new DataTransfer();
+    data.setData('text/plain', text);
+    elem.dispatchEvent(new ClipboardEvent('paste', {clipboardData: data, bubbles: true, cancelable: true}));
+    
+    var previewVisible = !!arguments[2] && Array.prototype.some.call(document.querySelectorAll(arguments[2]), function(e) {
+        return e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden';
+    });
+    return {previousLength: previousLength, length: (elem.textContent || '').trim().length, previewVisible: previewVisible};
+"""
+
+# Text at least this long (or containing emoji) is pasted rather than typed
+PASTE_MIN_LENGTH = 40
+
+# Prebuilt locators for the CSS caption probes
+CAPTION_TAB11_CSS = "div[contenteditable='true'][data-tab='11']"
+CAPTION_READY_LOCATOR = (By.CSS_SELECTOR,
+    "div[contenteditable='true'][data-tab='11'], "
+    "div[contenteditable='true'][placeholder*='caption' i], "
+    "div[contenteditable='true'][placeholder*='type a message' i]"
+)
+
+
+def iter_contacts(file_path):
     """
-    Read contacts, messages, and image paths from Excel file
+    Yield contacts, messages, and image paths from Excel file one row at a time
     Expected format: 
     - Column A = Contact Number
     - Column B = Contact Name (optional - if provided, message will be: "Dear [Name],\n\n[Message]")
@@ -32,15 +343,28 @@ def read_contacts_from_excel(file_path):
     Final message format:
     - If Contact Name (B) is provided: "Dear [Name],\n\n[Message from C]"
     - If Contact Name (B) is empty: "[Message from C]" (sent as-is)
-"""
-    contacts = []
+    
+    Yields Contact tuples (number, message, image_path); the workbook is closed once the
+    generator is exhausted or closed. A file that can't be opened yields nothing; an error
+    partway through the sheet is printed and re-raised, so a half-read sheet isn't mistaken
+    for a finished one
+    """
+    try:
+        # Streaming read-only mode: rows are parsed as they are iterated instead of loading the
+        # whole workbook into memory; cached values are read instead of formulas
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    except Exception as e:
+        print(f"✗ Error reading Excel file: {str(e)}")
+        return
     
     try:
-        workbook = openpyxl.load_workbook(file_path)
         sheet = workbook.active
         
-        # Skip header row (if exists) - start from row 2
-        for row in sheet.iter_rows(min_row=2, values_only=True):
+        # Relative image paths (Column D) are resolved against the Excel file's folder
+        excel_dir = os.path.dirname(os.path.abspath(file_path))
+        
+        # Skip header row (if exists) - start from row 2; only columns A-D are used
+        for row in sheet.iter_rows(min_row=2, max_col=4, values_only=True):
             if row[0] and row[2]:  # Check if contact number (A) and message (C) exist
                 contact = str(row[0]).strip()
                 
@@ -65,7 +389,7 @@ def read_contacts_from_excel(file_path):
                     final_message = message
                 
                 # Format contact number (remove spaces, ensure country code)
-                contact = contact.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
+                contact = contact.translate(PHONE_STRIP_TABLE)
                 
                 # Get image path from Column D (if provided)
                 image_path = None
@@ -74,64 +398,135 @@ def read_contacts_from_excel(file_path):
                     if image_path:
                         # Convert to absolute path if relative
                         if not os.path.isabs(image_path):
-                            excel_dir = os.path.dirname(os.path.abspath(file_path))
                             image_path = os.path.join(excel_dir, image_path)
                 
-                contacts.append({
-                    'number': contact,
-                    'message': final_message,
-                    'image_path': image_path
-                })
-        
-        workbook.close()
-        print(f"✓ Loaded {len(contacts)} contacts from {file_path}")
-        return contacts
+                yield Contact(contact, final_message, image_path)
     
     except Exception as e:
         print(f"✗ Error reading Excel file: {str(e)}")
+        raise
+    finally:
+        # Read-only workbooks keep the file open until closed
+        workbook.close()
+
+
+def count_contacts(file_path):
+    """
+    Count the rows iter_contacts will yield (number in A and message in C) with one streaming
+    pass over columns A-C, without building the messages
+    
+    Returns:
+        Number of contacts, or None if the file could not be read
+    """
+    try:
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True, keep_links=False)
+    except Exception:
+        return None
+    try:
+        rows = workbook.active.iter_rows(min_row=2, max_col=3, values_only=True)
+        return sum(1 for row in rows if row[0] and len(row) > 2 and row[2])
+    except Exception:
+        return None
+    finally:
+        workbook.close()
+
+
+def read_contacts_from_excel(file_path):
+    """
+    Read all contacts from Excel file (see iter_contacts for the expected format)
+    
+    Returns a list of Contact tuples (number, message, image_path), empty if the file
+    could not be read
+    """
+    try:
+        contacts = list(iter_contacts(file_path))
+    except Exception:
         return []
+    if contacts:
+        print(f"✓ Loaded {len(contacts)} contacts from {file_path}")
+    return contacts
+
+
+def running_chrome_available(address=f"127.0.0.1:{DEBUGGING_PORT}", timeout=0.5):
+    """
+    Check whether a Chrome started by an earlier run is still listening on its debugging port
+    
+    Returns:
+        True if the DevTools endpoint answered, False otherwise
+    """
+    try:
+        with urllib.request.urlopen(f"http://{address}/json/version", timeout=timeout):
+            return True
+    except Exception:
+        return False
 
 
 def init_whatsapp_web(driver):
     """
     Initialize WhatsApp Web and wait for user to scan QR code
     """
+    # Re-attached browser that is already logged in: skip reloading the web app
+    try:
+        if driver.current_url.startswith("https://web.whatsapp.com") and driver.find_elements(*SEARCH_BOX_LOCATOR):
+            print("\n✓ Reusing the open WhatsApp Web session")
+            _on_whatsapp_web.add(driver.session_id)
+            return True
+    except WebDriverException:
+        pass
+    
     print("\n📱 Opening WhatsApp Web...")
     driver.get("https://web.whatsapp.com")
     
-    print("\n⚠️  Please scan the QR code with your phone to log in to WhatsApp Web")
+    if HEADLESS:
+        print("\n⚠️  Running headless (WA_HEADLESS=1) - there is no window to scan a QR code in.")
+        print("   If this profile isn't logged in yet, run once without WA_HEADLESS first.")
+    else:
+        print("\n⚠️  Please scan the QR code with your phone to log in to WhatsApp Web")
     print("   Waiting for you to complete login...")
     
     # Wait for the main chat list to appear (indicates successful login)
     try:
         # Wait for the search box or chat list to appear (sign of successful login)
         WebDriverWait(driver, 300).until(
-            EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true'][@data-tab='3']"))
+            EC.presence_of_element_located(SEARCH_BOX_LOCATOR)
         )
         print("✓ Successfully logged in to WhatsApp Web!")
-        time.sleep(1)
+        _on_whatsapp_web.add(driver.session_id)
         return True
     except TimeoutException:
         print("✗ Login timeout. Please try again.")
         return False
 
 
+def wait_for_main_page(driver, timeout=30):
+    """
+    Wait after a (re)load until the chat-list search box is rendered and visible
+    
+    Polled with one small script per check (200ms), so it returns as soon as the app is usable.
+    Raises TimeoutException if it doesn't appear within timeout seconds.
+    """
+    return fast_wait(driver, timeout, poll_frequency=0.2).until(
+        lambda d: any_visible(d, SEARCH_BOX_CSS)
+    )
+
+
 def ensure_main_page(driver):
     """
     Ensure we're on the main WhatsApp Web page (not in a chat)
-    Only reloads if we're not on WhatsApp Web at all
+    Only reloads if we're not on WhatsApp Web at all; skips the URL check entirely while
+    the driver is marked as on WhatsApp Web (see _on_whatsapp_web)
     """
+    if driver.session_id in _on_whatsapp_web:
+        return
     try:
         current_url = driver.current_url
         if "web.whatsapp.com" not in current_url:
             # Only reload if we're not on WhatsApp Web at all
             print(f"  ⚠️  Not on WhatsApp Web (current URL: {current_url}), navigating to WhatsApp Web...")
             driver.get("https://web.whatsapp.com")
-            time.sleep(3)
             # Wait for page to load
-            WebDriverWait(driver, 30).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true'][@data-tab='3']"))
-            )
+            wait_for_main_page(driver, 30)
+        _on_whatsapp_web.add(driver.session_id)
         # Don't reload if we're already on WhatsApp Web, even if in a chat
         # We'll navigate back using the back button or clearing search
     except Exception as e:
@@ -157,12 +552,9 @@ def verify_on_whatsapp_web(driver):
         if "download" in page_title or "whatsapp for windows" in page_title:
             print(f"  ⚠️  Redirected to download page! Navigating back to WhatsApp Web...")
             driver.get("https://web.whatsapp.com")
-            time.sleep(3)
             # Wait for WhatsApp Web to load
             try:
-                WebDriverWait(driver, 30).until(
-                    EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true'][@data-tab='3']"))
-                )
+                wait_for_main_page(driver, 30)
                 print(f"  ✓ Back on WhatsApp Web")
                 return True
             except TimeoutException:
@@ -171,9 +563,9 @@ def verify_on_whatsapp_web(driver):
         
         # Verify search box exists (confirms we're on the right page)
         try:
-            driver.find_element(By.XPATH, "//div[@contenteditable='true'][@data-tab='3']")
+            driver.find_element(*SEARCH_BOX_LOCATOR)
             return True
-        except:
+        except Exception:
             print(f"  ⚠️  WhatsApp Web elements not found, might be loading...")
             return False
             
@@ -189,47 +581,78 @@ def go_back_to_main_page(driver):
     try:
         # First, press Escape to close any open chat or search
         try:
-            from selenium.webdriver.common.action_chains import ActionChains
             ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-            time.sleep(0.5)
-        except:
+        except Exception:
             pass
         
         # Try to clear search box (this goes back to main view)
         try:
-            search_box = WebDriverWait(driver, 3).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[@contenteditable='true'][@data-tab='3']"))
+            search_box = fast_wait(driver, 3).until(
+                EC.element_to_be_clickable(SEARCH_BOX_LOCATOR)
             )
             search_box.click()
-            time.sleep(0.2)
             # Clear any text in search box
             search_box.send_keys(Keys.CONTROL + "a")
-            time.sleep(0.1)
             search_box.send_keys(Keys.BACKSPACE)
-            time.sleep(0.3)
+            fast_wait(driver, 1).until(lambda d: not search_box.text.strip())
             # Press Escape again to ensure we're back to main view
             ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-            time.sleep(0.3)
-        except:
+        except Exception:
             # If search box not found, try pressing Escape again
             try:
-                from selenium.webdriver.common.action_chains import ActionChains
                 ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-                time.sleep(0.5)
-            except:
+            except Exception:
                 pass
         
         # Verify we're back on main page by checking for search box
         try:
-            WebDriverWait(driver, 3).until(
-                EC.presence_of_element_located((By.XPATH, "//div[@contenteditable='true'][@data-tab='3']"))
+            fast_wait(driver, 3, poll_frequency=0.1).until(
+                EC.presence_of_element_located(SEARCH_BOX_LOCATOR)
             )
-        except:
+        except Exception:
             pass
-    except:
+    except Exception:
         pass
 
 
+def paste_text(driver, elem, text, preview_css=None):
+    """
+    Replace the content of a contenteditable with text via one synthetic paste event
+    
+    Args:
+        driver: Selenium WebDriver instance
+        elem: Target contenteditable element (message or caption box)
+        text: Text to paste (newlines and non-BMP characters are fine)
+        preview_css: Optional CSS selector whose visibility is reported back as previewVisible
+    
+    Returns:
+        Dict with previousLength, length and previewVisible; length is 0 if the editor ignored the paste
+    """
+    try:
+        return driver.execute_script(PASTE_TEXT_JS, elem, text, preview_css) or {}
+    except Exception as e:
+        print(f"  ⚠️  Paste failed: {str(e)}")
+        return {}
+
+
+def insert_text_cdp(driver, text):
+    """
+    Type text into the focused element with one DevTools Input.insertText command
+    
+    Chrome inserts the whole string as a single trusted text input (like an IME commit), so it
+    costs one round-trip instead of one key event per character, and emoji / non-BMP characters
+    are fine. Newlines are not turned into Shift+Enter line breaks - use it for single-line text.
+    
+    Returns:
+        True if the command was accepted, False otherwise (e.g. not a Chromium driver)
+    """
+    try:
+        driver.execute_cdp_cmd("Input.insertText", {"text": text})
+        return True
+    except (WebDriverException, AttributeError):
+        return False
+
+
 def set_message_text_js(driver, message_box, text):
     """
     Set text in message box using a hybrid approach that properly handles newlines:
@@ -247,18 +670,12 @@ def set_message_text_js(driver, message_box, text):
         True if successful, False otherwise
     """
     try:
-        from selenium.webdriver.common.action_chains import ActionChains
-        from selenium.webdriver.common.keys import Keys
-        
         # Focus and clear the element first
         message_box.click()
         time.sleep(0.1)
         
-        # Clear existing content
-        ActionChains(driver).key_down(Keys.CONTROL).send_keys('a').key_up(Keys.CONTROL).perform()
-        time.sleep(0.05)
-        ActionChains(driver).send_keys(Keys.DELETE).perform()
-        time.sleep(0.1)
+        # Clear existing content (select all + delete as one chord; Keys.NULL releases Ctrl)
+        message_box.send_keys(Keys.CONTROL, 'a', Keys.NULL, Keys.DELETE)
         
         # Split text by newlines
         lines = text.split('\n')
@@ -271,7 +688,7 @@ def set_message_text_js(driver, message_box, text):
             
             if line:  # Only type if line is not empty
                 # Check if line has emojis (non-BMP characters)
-                has_emoji = any(ord(char) > 0xFFFF for char in line)
+                has_emoji = NON_BMP_RE.search(line) is not None
                 
                 if has_emoji:
                     # Use JavaScript insertText for lines with emojis
@@ -298,325 +715,403 @@ def set_message_text_js(driver, message_box, text):
         time.sleep(0.2)
         return True
     except Exception as e:
+        if '\n' in text:
+            # The script fallback's Shift+Enter is synthetic and ignored - the lines would run together
+            print(f"  ⚠️  Hybrid text setting failed: {str(e)}")
+            return False
         print(f"  ⚠️  Hybrid text setting failed: {str(e)}, trying simple fallback...")
         # Fallback: Simple JavaScript method
         try:
-            driver.execute_script("""
-                var element = arguments[0];
-                var text = arguments[1];
-                element.focus();
-                var range = document.createRange();
-                range.selectNodeContents(element);
-                var selection = window.getSelection();
-                selection.removeAllRanges();
-                selection.addRange(range);
-                document.execCommand('delete', false, null);
-                document.execCommand('insertText', false, text);
-            """, message_box, text)
+            driver.execute_script(INSERT_TEXT_JS, message_box, text, None)
             time.sleep(0.3)
             return True
-        except:
+        except Exception:
             return False
 
 
-def force_focus_message_box(driver, message_box, max_attempts=5):
-    """
-    Aggressively focus the message box using multiple methods
-    Returns True if successfully focused, False otherwise
+def set_message_and_send(driver, message_box, text):
     """
-    from selenium.webdriver.common.action_chains import ActionChains
+    Focus, clear, fill and send the message box in a single execute_script (INSERT_AND_SEND_JS)
     
-    for attempt in range(max_attempts):
-        try:
-            # Wait a bit for element to be ready
-            time.sleep(0.3)
-            
-            # Method 1: Scroll into view and use ActionChains to move and click
-            try:
-                driver.execute_script("arguments[0].scrollIntoView({behavior: 'instant', block: 'center', inline: 'center'});", message_box)
-                time.sleep(0.2)
-                
-                # Use ActionChains to move mouse to element and click
-                ActionChains(driver).move_to_element(message_box).click().perform()
-                time.sleep(0.4)
-                
-                # Verify focus
-                active_elem = driver.execute_script("return document.activeElement;")
-                if active_elem == message_box:
-                    print(f"  ✓ Message box focused (ActionChains method)")
-                    return True
-            except:
-                pass
-            
-            # Method 2: Aggressive JavaScript focus with multiple events
-            try:
-                driver.execute_script("""
-                    var elem = arguments[0];
-                    // Remove focus from any other element
-                    if (document.activeElement && document.activeElement !== elem) {
-                        document.activeElement.blur();
-                    }
-                    // Scroll to element
-                    elem.scrollIntoView({behavior: 'instant', block: 'center'});
-                    // Focus and click
-                    elem.focus();
-                    elem.click();
-                    // Force focus by setting tabindex if needed
-                    if (!elem.hasAttribute('tabindex')) {
-                        elem.setAttribute('tabindex', '-1');
-                    }
-                    elem.focus();
-                    // Dispatch all focus-related events
-                    var events = ['focus', 'focusin', 'mousedown', 'mouseup', 'click'];
-                    events.forEach(function(eventType) {
-                        var event = new Event(eventType, { bubbles: true, cancelable: true });
-                        elem.dispatchEvent(event);
-                    });
-                """, message_box)
-                time.sleep(0.5)
-                
-                # Verify focus
-                active_elem = driver.execute_script("return document.activeElement;")
-                if active_elem == message_box:
-                    print(f"  ✓ Message box focused (aggressive JavaScript)")
-                    return True
-            except:
-                pass
-            
-            # Method 3: Click on parent container or footer area
-            try:
-                # Try clicking on the footer area that contains the message box
-                footer = driver.find_element(By.XPATH, "//footer")
-                ActionChains(driver).move_to_element(footer).click().perform()
-                time.sleep(0.3)
-                # Now click the message box
-                message_box.click()
-                time.sleep(0.4)
-                
-                active_elem = driver.execute_script("return document.activeElement;")
-                if active_elem == message_box:
-                    print(f"  ✓ Message box focused (footer click method)")
-                    return True
-            except:
-                pass
-            
-            # Method 4: Press Escape to clear any focus, then focus message box
-            try:
-                ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-                time.sleep(0.3)
-                # Click multiple times
-                for _ in range(3):
-                    message_box.click()
-                    time.sleep(0.2)
-                
-                # Force focus with JavaScript
-                driver.execute_script("arguments[0].focus();", message_box)
-                time.sleep(0.3)
-                
-                active_elem = driver.execute_script("return document.activeElement;")
-                if active_elem == message_box:
-                    print(f"  ✓ Message box focused (Escape + multiple clicks)")
-                    return True
-            except:
-                pass
-            
-            # Method 5: Use JavaScript to simulate a real user click
-            try:
-                driver.execute_script("""
-                    var elem = arguments[0];
-                    var rect = elem.getBoundingClientRect();
-                    var x = rect.left + rect.width / 2;
-                    var y = rect.top + rect.height / 2;
-                    
-                    // Create and dispatch mouse events
-                    var mouseEvents = ['mousedown', 'mouseup', 'click'];
-                    mouseEvents.forEach(function(eventType) {
-                        var event = new MouseEvent(eventType, {
-                            view: window,
-                            bubbles: true,
-                            cancelable: true,
-                            clientX: x,
-                            clientY: y
-                        });
-                        elem.dispatchEvent(event);
-                    });
-                    
-                    // Focus
-                    elem.focus();
-                """, message_box)
-                time.sleep(0.5)
-                
-                active_elem = driver.execute_script("return document.activeElement;")
-                if active_elem == message_box:
-                    print(f"  ✓ Message box focused (simulated mouse events)")
-                    return True
-            except:
-                pass
-            
-        except Exception as e:
-            if attempt < max_attempts - 1:
-                time.sleep(0.5)
-                continue
-            else:
-                print(f"  ⚠️  Could not focus message box after {max_attempts} attempts")
-                return False
+    Args:
+        driver: Selenium WebDriver instance
+        message_box: Message box element
+        text: Single-line text to send (its Shift+Enter line breaks are synthetic and WhatsApp may
+              ignore them - multi-line text goes through set_message_text_js)
     
-    return False
+    Returns:
+        Dict with length (0 if the text didn't go in) and clicked (send button was clicked);
+        empty if the script failed
+    """
+    try:
+        return driver.execute_script(INSERT_AND_SEND_JS, message_box, text, None, SEND_BUTTON_CSS) or {}
+    except Exception as e:
+        print(f"  ⚠️  JavaScript insert + send failed: {str(e)}")
+        return {}
 
 
-def get_fresh_message_box(driver, max_retries=3):
+def get_fresh_message_box(driver, max_retries=3, deadline=None):
     """
     Get a fresh message box element to avoid stale element issues
     Re-finds the element each time it's called
     
     Args:
         driver: Selenium WebDriver instance
-        max_retries: Maximum number of retries to find the element
+        max_retries: Search budget in units of 5 seconds (one continuous wait, no pauses in between)
+        deadline: Optional time.monotonic() value after which to give up, however much budget is left
     
     Returns:
         Message box element or None if not found
     """
-    message_selectors = [
-        "//div[@contenteditable='true'][@data-tab='10']",
-        "//div[@contenteditable='true'][@role='textbox']",
-        "//div[@contenteditable='true'][@data-testid='conversation-compose-box-input']",
-        "//footer//div[@contenteditable='true']",
-        "//div[@contenteditable='true'][@spellcheck='true']",
-        "//div[@contenteditable='true'][contains(@class, 'selectable-text')]"
-    ]
-    
-    for attempt in range(max_retries):
-        for selector in message_selectors:
-            try:
-                # Use element_to_be_clickable for better reliability
-                element = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, selector))
-                )
-                if element and element.is_displayed():
-                    return element
-            except (TimeoutException, Exception):
-                continue
-        
-        if attempt < max_retries - 1:
-            time.sleep(0.8)  # Wait longer before retrying
+    wait_seconds = 5 * max_retries
+    if deadline is not None:
+        wait_seconds = min(wait_seconds, deadline - time.monotonic())
+        if wait_seconds <= 0:
+            return None
+    try:
+        # Every candidate selector is checked in one execute_script per poll, and a script error
+        # while the chat re-renders just counts as another miss
+        return WebDriverWait(driver, wait_seconds, poll_frequency=0.1,
+                             ignored_exceptions=(WebDriverException,)).until(
+            lambda d: first_visible(d, MESSAGE_BOX_SELECTORS)
+        )
+    except TimeoutException:
+        return None
+
+
+def refresh_if_stale(driver, element, max_retries=3):
+    """
+    Reuse a previously found message box while it is still attached to the page,
+    re-finding it (see get_fresh_message_box) only if it went stale
     
-    return None
+    Args:
+        driver: Selenium WebDriver instance
+        element: Previously found message box element (or None)
+        max_retries: Retries passed to get_fresh_message_box when re-finding
+    
+    Returns:
+        Message box element or None if not found
+    """
+    if element is not None:
+        try:
+            element.is_enabled()  # Any call on a replaced node raises StaleElementReferenceException
+            return element
+        except StaleElementReferenceException:
+            pass
+    return get_fresh_message_box(driver, max_retries=max_retries)
 
 
 def clear_attachment_preview(driver):
     """
     Clear any leftover attachment preview before sending next message
-    Simplified version - just press Escape and look for close buttons
+    
+    One script call checks for a visible close button and clicks it; in the usual case
+    (nothing open) that is the only round-trip. Escape is only pressed if the click
+    didn't close the composer.
     """
     try:
-        from selenium.webdriver.common.action_chains import ActionChains
-        # Press Escape a few times to close any previews
-        for _ in range(2):
-            ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-            time.sleep(0.2)
-        
-        # Try to find and click close buttons
-        try:
-            close_buttons = driver.find_elements(By.XPATH, 
-                "//span[@data-icon='close'] | " +
-                "//button[contains(@aria-label, 'Close')] | " +
-                "//button[contains(@aria-label, 'Remove')]"
-            )
-            for btn in close_buttons:
-                try:
-                    if btn.is_displayed():
-                        driver.execute_script("arguments[0].click();", btn)
-                        time.sleep(0.3)
-                        break
-                except:
-                    continue
-        except:
-            pass
-        
+        clicked = driver.execute_script("""
+            var buttons = document.querySelectorAll(arguments[0]);
+            for (var i = 0; i < buttons.length; i++) {
+                if (buttons[i].getClientRects().length > 0) {
+                    buttons[i].click();
+                    return true;
+                }
+            }
+            return false;
+        """, CLOSE_BUTTON_CSS)
+        if clicked and not wait_preview_gone(driver, timeout=2):
+            ActionChains(driver).send_keys(Keys.ESCAPE).pause(0.2).send_keys(Keys.ESCAPE).perform()
         return True
-    except:
+    except Exception:
         return False
 
 
-def verify_message_sent(driver, timeout=10):
+def fast_wait(driver, timeout=2, poll_frequency=0.05):
     """
-    Verify that a message was actually sent by checking if message box is cleared
-    Returns True if message appears to be sent, False otherwise
+    WebDriverWait with a short poll interval, for replacing fixed sleeps that guard a DOM condition
+    
+    Returns as soon as the condition holds instead of always paying the full sleep.
+    Missing or stale elements (e.g. while a chat re-renders) count as "not yet" rather than
+    aborting the wait. Callers catch TimeoutException when the condition is optional.
     """
-    try:
-        # Wait a bit for message to send
-        time.sleep(1)
-        
-        # Check if message box is cleared (indicates message was sent)
-        message_box = get_fresh_message_box(driver)
-        if message_box:
-            # Wait for message box to be cleared
-            for _ in range(timeout):
-                try:
-                    text = message_box.text.strip()
-                    inner_html = message_box.get_attribute('innerHTML').strip()
-                    # If message box is empty or only has placeholder, message was sent
-                    if not text or not inner_html or inner_html == '<br>' or inner_html == '':
-                        return True
-                    time.sleep(0.5)
-                except:
-                    time.sleep(0.5)
-                    continue
-        
-        # Alternative: Check if send button is disabled or message appears in chat
-        try:
-            # Look for the sent message in chat (checkmark icon or sent indicator)
-            sent_indicators = driver.find_elements(By.XPATH, 
-                "//span[@data-icon='msg-dblcheck'] | " +
-                "//span[@data-icon='msg-check'] | " +
-                "//span[contains(@data-testid, 'check')]"
-            )
-            if sent_indicators:
-                return True
-        except:
-            pass
-        
-        return False
-    except:
-        return True  # Assume sent if we can't verify
+    return WebDriverWait(driver, timeout, poll_frequency=poll_frequency,
+                         ignored_exceptions=(NoSuchElementException, StaleElementReferenceException))
 
 
-def send_image_with_caption(driver, message_box, image_path, caption, contact_number, delay_seconds):
+def outgoing_state(driver):
     """
-    Send image with caption in WhatsApp Web
+    Count the outgoing messages in the open chat and check whether the last one is acknowledged
+    
+    Returns:
+        [count, last_acked] from a single browser round-trip
+    """
+    return driver.execute_script("""
+        var outs = document.querySelectorAll(arguments[0]);
+        var last = outs[outs.length - 1];
+        return [outs.length, !!(last && last.querySelector(arguments[1]))];
+    """, OUTGOING_MESSAGE_CSS, MESSAGE_ACK_CSS)
+
+
+def any_visible(driver, css_selector, text=None):
+    """
+    Check in a single browser round-trip whether any element matching a CSS selector is visible
     
     Args:
         driver: Selenium WebDriver instance
-        message_box: Message input box element
-        image_path: Path to image file (will be converted to absolute path)
-        caption: Caption text to send with image
-        contact_number: Contact number (for logging)
-        delay_seconds: Delay after sending
-    """
-    # Use the module-level get_fresh_message_box function
+        css_selector: CSS selector (may be a comma-separated group)
+        text: Optional text the element's textContent must contain
     
-    def verify_chat_is_open():
+    Returns:
+        True if at least one matching element is visible, False otherwise
+    """
+    return driver.execute_script("""
+        var text = arguments[1];
+        return Array.prototype.some.call(document.querySelectorAll(arguments[0]), function(e) {
+            if (text && (e.textContent || '').indexOf(text) === -1) {
+                return false;
+            }
+            return e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden';
+        });
+    """, css_selector, text)
+
+
+def first_visible(driver, css_selector, context=None):
+    """
+    Return the first visible element matching a CSS selector, in a single browser round-trip
+    
+    Args:
+        driver: Selenium WebDriver instance
+        css_selector: CSS selector (may be a comma-separated group), or a list of selectors
+                      tried in priority order
+        context: Optional WebElement to search inside (defaults to the document)
+    
+    Returns:
+        The first visible WebElement (document order within a selector), or None
+    """
+    if isinstance(css_selector, str):
+        css_selector = [css_selector]
+    return driver.execute_script("""
+        var root = arguments[1] || document;
+        for (var s = 0; s < arguments[0].length; s++) {
+            var matches = root.querySelectorAll(arguments[0][s]);
+            for (var i = 0; i < matches.length; i++) {
+                var e = matches[i];
+                if (e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden') {
+                    return e;
+                }
+            }
+        }
+        return null;
+    """, list(css_selector), context)
+
+
+def find_visible(driver, xpath, context=None):
+    """
+    Evaluate an XPath in the browser and return only the visible matches, in a single round-trip
+    
+    Args:
+        driver: Selenium WebDriver instance
+        xpath: XPath expression (may be a '|' union)
+        context: Optional WebElement to evaluate relative XPaths against (defaults to the document)
+    
+    Returns:
+        List of visible WebElements in document order
+    """
+    return driver.execute_script("""
+        var result = document.evaluate(arguments[0], arguments[1] || document, null,
+                                       XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+        var visible = [];
+        for (var i = 0; i < result.snapshotLength; i++) {
+            var e = result.snapshotItem(i);
+            if (e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden') {
+                visible.push(e);
+            }
+        }
+        return visible;
+    """, xpath, context) or []
+
+
+def list_contenteditables(driver, css_selector="div[contenteditable='true']"):
+    """
+    Snapshot matching contenteditable elements and their attributes in a single browser round-trip
+    
+    Args:
+        driver: Selenium WebDriver instance
+        css_selector: CSS selector for the elements to snapshot
+    
+    Returns:
+        List of dicts with keys: el (WebElement), data_tab (str or None), placeholder,
+        aria_label, aria_placeholder and visible
+    """
+    return driver.execute_script("""
+        return Array.from(document.querySelectorAll(arguments[0])).map(function(e) {
+            return {
+                el: e,
+                data_tab: e.getAttribute('data-tab'),
+                placeholder: e.getAttribute('placeholder') || '',
+                aria_label: e.getAttribute('aria-label') || '',
+                aria_placeholder: e.getAttribute('aria-placeholder') || '',
+                visible: e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden'
+            };
+        });
+    """, css_selector) or []
+
+
+def caption_rank(data_tab, placeholder, has_image_preview=False):
+    """
+    Rank a contenteditable as a caption input candidate (lower is better)
+    
+    Caption box logic:
+    - If image attached: data-tab='10' IS the caption box
+    - If no image: data-tab='11' or other caption-specific elements
+    - The search box (data-tab='3') is never a caption box
+    
+    Returns:
+        0 (data-tab='11'), 1 (caption placeholder), 2 (message placeholder),
+        3 (data-tab='10' while an image is attached) or None if not a candidate
+    """
+    if data_tab == '11':
+        return 0
+    if data_tab == '3':
+        return None
+    placeholder = (placeholder or '').lower()
+    if 'caption' in placeholder:
+        return 1
+    if 'message' in placeholder and data_tab != '10':
+        return 2
+    if data_tab == '10' and has_image_preview:
+        return 3  # Message box becomes caption when image attached
+    return None
+
+
+def wait_for_dom(driver, css_selector, present=True, timeout=5, element=None):
+    """
+    Wait inside the browser until a CSS selector is (or is no longer) visible, in a single round-trip
+    
+    A MutationObserver re-checks the condition on every DOM change, so the call returns as soon as
+    the page updates instead of on the next poll tick.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        css_selector: CSS selector (may be a comma-separated group)
+        present: True to wait for a visible match, False to wait until none is visible
+        timeout: Maximum seconds to wait
+        element: Optional WebElement that also counts as a match while attached and visible
+    
+    Returns:
+        True if the condition held within timeout, False otherwise
+    """
+    previous_script_timeout = driver.timeouts.script
+    driver.set_script_timeout(timeout + 5)
+    try:
+        return driver.execute_async_script("""
+            var css = arguments[0], present = arguments[1], timeoutMs = arguments[2], element = arguments[3];
+            var done = arguments[arguments.length - 1];
+            function visible(e) {
+                return e.isConnected && e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden';
+            }
+            function met() {
+                var found = (element && visible(element)) ||
+                            Array.prototype.some.call(document.querySelectorAll(css), visible);
+                return found === present;
+            }
+            if (met()) {
+                return done(true);
+            }
+            var timer;
+            var observer = new MutationObserver(function() {
+                if (met()) {
+                    observer.disconnect();
+                    clearTimeout(timer);
+                    done(true);
+                }
+            });
+            observer.observe(document.body, {subtree: true, childList: true, attributes: true});
+            timer = setTimeout(function() {
+                observer.disconnect();
+                done(met());
+            }, timeoutMs);
+        """, css_selector, present, int(timeout * 1000), element)
+    finally:
+        driver.set_script_timeout(previous_script_timeout)
+
+
+def wait_preview_gone(driver, caption_box=None, timeout=60):
+    """
+    Wait until the media composer closes
+    
+    The composer counts as open while caption_box (if given) is still attached and visible,
+    or while a dialog overlay still shows the image preview.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        caption_box: Optional caption input WebElement of the composer
+        timeout: Maximum seconds to wait
+    
+    Returns:
+        True if the composer closed within timeout, False otherwise
+    """
+    return wait_for_dom(driver, COMPOSER_PREVIEW_CSS, present=False, timeout=timeout, element=caption_box)
+
+
+def is_sticker_mode(driver):
+    """
+    Check whether WhatsApp's sticker UI (sticker icon or "Send sticker" button) is visible
+    """
+    return (any_visible(driver,
+                "span[data-icon='sticker'], "
+                "button[aria-label*='sticker'], "
+                "div[aria-label*='sticker'][aria-label*='send']")
+            or any_visible(driver, "span", text="Send sticker"))
+
+
+def verify_photo_mode(driver):
+    """
+    Classify the current attachment UI as photo mode or sticker mode in one pass
+
+    Returns:
+        'sticker' if sticker send UI is visible,
+        'photo' if caption input, photo editing tools or an image preview is visible,
+        'unknown' otherwise (interface may still be loading)
+    """
+    if is_sticker_mode(driver):
+        return 'sticker'
+
+    if any_visible(driver,
+            "div[contenteditable='true'][data-tab='11'], "
+            "div[contenteditable='true'][placeholder*='type a message' i], "
+            "span[data-icon='crop'], span[data-icon='rotate'], span[data-icon='filter'], "
+            "div[aria-label*='crop'], div[aria-label*='rotate'], "
+            "img[src*='blob'], div[data-testid*='media']"):
+        return 'photo'
+
+    return 'unknown'
+
+
+def send_image_with_caption(driver, message_box, image_path, caption, contact_number, delay_seconds):
+    """
+    Send image with caption in WhatsApp Web
+    
+    Args:
+        driver: Selenium WebDriver instance
+        message_box: Message input box element
+        image_path: Path to image file (will be converted to absolute path)
+        caption: Caption text to send with image
+        contact_number: Contact number (for logging)
+        delay_seconds: Delay between contacts (the pause itself is taken by send_whatsapp_message)
+    """
+    # Use the module-level get_fresh_message_box function
+    
+    def verify_chat_is_open():
         """Verify that we're actually in a chat conversation"""
         try:
-            # Check if message box exists and is visible
-            msg_box = get_fresh_message_box(driver)
-            if msg_box and msg_box.is_displayed():
+            # Check if message box exists (get_fresh_message_box only returns visible ones)
+            if get_fresh_message_box(driver):
                 return True
-            # Also check for chat header or other chat indicators
-            chat_indicators = [
-                "//div[@data-testid='conversation-header']",
-                "//div[@data-testid='chatlist']",
-                "//div[contains(@class, 'chat')]"
-            ]
-            for indicator in chat_indicators:
-                try:
-                    elem = driver.find_element(By.XPATH, indicator)
-                    if elem.is_displayed():
-                        return True
-                except:
-                    continue
-            return False
-        except:
+            # Also check for chat header or other chat indicators (one grouped query)
+            return any_visible(driver, CHAT_OPEN_CSS)
+        except WebDriverException:
             return False
     
     def send_text_fallback():
@@ -627,13 +1122,39 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         print(f"  ⚠️  Image flow failed - text-only fallback is disabled (Mode 2).")
         try:
             # Best-effort: close any open media composer / attachment UI
-            from selenium.webdriver.common.action_chains import ActionChains
             ActionChains(driver).send_keys(Keys.ESCAPE).perform()
             time.sleep(0.8)
-        except:
+        except WebDriverException:
             pass
         return False
     
+    # The image preview element is memoized for this send and only re-found when missing or stale.
+    # The last answer is also reused for 100ms so back-to-back checks cost one round-trip;
+    # reset_preview_cache() drops it whenever the composer may have changed (send click, clear).
+    _preview_cache = {'elem': None, 'seen': False, 'checked_at': 0.0}
+    
+    def reset_preview_cache():
+        _preview_cache.update(elem=None, seen=False, checked_at=0.0)
+    
+    def preview_visible(ttl=0.1):
+        """True if the attached image preview (blob image or media container) is visible"""
+        now = time.time()
+        if now - _preview_cache['checked_at'] < ttl:
+            return _preview_cache['seen']
+        elem = _preview_cache['elem']
+        seen = False
+        if elem is not None:
+            try:
+                seen = elem.is_displayed()
+            except StaleElementReferenceException:
+                pass
+        if not seen:
+            _preview_cache['elem'] = first_visible(driver, PREVIEW_CSS)
+            seen = _preview_cache['elem'] is not None
+        _preview_cache.update(seen=seen, checked_at=now)
+        return seen
+    
+    # No implicit wait to suspend here: create_chrome_driver pins it to 0 for the whole session
     try:
         # Step 0: Verify chat is actually open
         print(f"  → Verifying chat is open...")
@@ -651,37 +1172,20 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         
         # Step 2: Wait for chat to be fully loaded, then find attachment button
         print(f"  → Waiting for chat to fully load...")
-        time.sleep(2)  # Give chat more time to fully load
+        # Chat is ready once its attach button is rendered (up to 2s)
+        wait_for_dom(driver, ATTACH_BUTTON_CSS, timeout=2)
         
         print(f"  → Looking for attachment button...")
         attachment_button = None
-        attachment_selectors = [
-            "//span[@data-testid='clip']",
-            "//div[@data-testid='clip']",
-            "//span[@data-icon='attach']",
-            "//button[@title='Attach']",
-            "//button[@aria-label='Attach']"
-        ]
-        
-        # Try multiple times with delays
-        for attempt in range(5):
-            for selector in attachment_selectors:
-                try:
-                    elements = driver.find_elements(By.XPATH, selector)
-                    for elem in elements:
-                        try:
-                            if elem.is_displayed() and elem.is_enabled():
-                                attachment_button = elem
-                                break
-                        except:
-                            continue
-                    if attachment_button:
-                        break
-                except:
-                    continue
-            if attachment_button:
-                break
-            time.sleep(0.5)  # Wait a bit and try again
+        
+        # Poll (up to 3s) with one execute_script per poll covering every attach selector,
+        # returning as soon as the button renders
+        try:
+            attachment_button = fast_wait(driver, 3, poll_frequency=0.1).until(
+                lambda d: first_visible(d, ATTACH_BUTTON_CSS)
+            )
+        except WebDriverException:
+            pass
         
         if not attachment_button:
             print(f"  ⚠️  Could not find attachment button, sending text only")
@@ -692,10 +1196,10 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         print(f"  → Clicking attachment button...")
         try:
             driver.execute_script("arguments[0].click();", attachment_button)
-        except:
+        except WebDriverException:
             try:
                 attachment_button.click()
-            except:
+            except WebDriverException:
                 print(f"  ⚠️  Could not click attachment button, sending text only")
                 return send_text_fallback()
         
@@ -703,94 +1207,146 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         # Key rule: DO NOT use the first <input type="file"> and DO NOT click random divs.
         # Prefer WhatsApp's attach button by data-testid; fallback to 2nd menu item but click its clickable ancestor.
         print(f"  → Selecting 'Photos & videos' option (strict)...")
-        time.sleep(0.8)  # menu animation settle
+        try:
+            # Menu animation settle: wait (up to 0.8s) for the menu entries to render
+            fast_wait(driver, 0.8).until(lambda d: any_visible(d,
+                "[data-testid='attach-photo'], [data-testid='attach-image'], "
+                "[data-testid='attach-media'], div[role='menuitem']"))
+        except TimeoutException:
+            pass
 
         def _click(el):
             try:
                 driver.execute_script("arguments[0].click();", el)
                 return True
-            except:
+            except WebDriverException:
                 try:
                     el.click()
                     return True
-                except:
+                except WebDriverException:
                     return False
 
         def _clickable_ancestor(el):
             try:
-                return el.find_element(By.XPATH, "./ancestor::button[1] | ./ancestor::div[@role='button'][1]")
-            except:
+                return el.find_element(By.XPATH, CLICKABLE_ANCESTOR_XPATH)
+            except WebDriverException:
                 return None
 
-        # Try official data-testid selectors first (language independent)
+        # Try official data-testid selectors first (language independent),
+        # starting with the one that worked on a previous message
         selected = False
-        for sel in ["//*[@data-testid='attach-photo']",
-                    "//*[@data-testid='attach-image']",
-                    "//*[@data-testid='attach-media']"]:
+        photo_selectors = ["[data-testid='attach-photo']",
+                           "[data-testid='attach-image']",
+                           "[data-testid='attach-media']"]
+        cached_sel = _selector_cache.get('photos_videos')
+        if cached_sel:
+            photo_selectors = [cached_sel] + [s for s in photo_selectors if s != cached_sel]
+        for sel in photo_selectors:
             try:
-                candidates = driver.find_elements(By.XPATH, sel)
-                for c in candidates:
-                    if c.is_displayed() and c.is_enabled():
-                        if _click(c):
-                            selected = True
-                            print(f"  ✓ Selected Photos & videos via data-testid='{c.get_attribute('data-testid')}'")
-                            break
-                if selected:
+                # Visibility is checked in the browser: one round-trip per selector, not per candidate
+                c = first_visible(driver, sel + ":not([disabled])")
+                if c and _click(c):
+                    selected = True
+                    _selector_cache['photos_videos'] = sel
+                    print(f"  ✓ Selected Photos & videos via {'cached ' if sel == cached_sel else ''}selector {sel}")
                     break
-            except:
+            except StaleElementReferenceException:
+                _selector_cache.pop('photos_videos', None)
+            except Exception:
                 pass
 
         # Fallback: click the 2nd visible menu item (Document is 1st, Photos & videos is 2nd)
         if not selected:
             try:
-                menu_items = driver.find_elements(By.XPATH, "//div[@role='menuitem']")
-                visible_items = [m for m in menu_items if m.is_displayed()]
+                visible_items = driver.execute_script("""
+                    return Array.prototype.filter.call(document.querySelectorAll("div[role='menuitem']"), function(e) {
+                        return e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden';
+                    });
+                """) or []
                 if len(visible_items) >= 2:
                     target = visible_items[1]
                     click_target = _clickable_ancestor(target) or target
                     if _click(click_target):
                         selected = True
                         print(f"  ✓ Selected Photos & videos via menu item #2 (clicked ancestor button)")
-            except:
+            except Exception:
                 pass
 
         if not selected:
             print(f"  ✗ ERROR: Could not select Photos & videos")
             return send_text_fallback()
 
-        # Step 4: Pick the correct media <input type='file'> (reject accept='' and webp)
-        time.sleep(0.8)
-        file_input = None
+        # Wait for the media <input type='file'> the menu item inserts, instead of a fixed pause
+        try:
+            fast_wait(driver, 5, poll_frequency=0.1).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "input[type='file']"))
+            )
+        except TimeoutException:
+            pass
+
+        # Step 4: PRE-UPLOAD STICKER CHECK (bail out before probing inputs or uploading)
+        print(f"  → Verifying photo mode (not sticker)...")
+        try:
+            if is_sticker_mode(driver):
+                print(f"  ✗ ERROR: STICKER MODE detected before upload!")
+                print(f"      Keyboard navigation failed. Canceling...")
+                ActionChains(driver).send_keys(Keys.ESCAPE).perform()
+                time.sleep(1)
+                return send_text_fallback()
+            else:
+                print(f"  ✓ Photo mode confirmed (no sticker UI detected)")
+        except Exception as e:
+            print(f"  ⚠️  Could not verify mode: {str(e)}, proceeding anyway...")
+
+        # Step 5: Pick the correct media <input type='file'> (reject accept='' and webp)
+        file_input = _file_input_cache.get(driver.session_id)
+        if file_input:
+            print(f"  → Reusing media file input from the previous upload")
+        try:
+            # Fast path: let the browser filter for the media picker (accepts video, not sticker/webp)
+            media_inputs = [] if file_input else driver.find_elements(By.CSS_SELECTOR, MEDIA_FILE_INPUT_CSS)
+            if media_inputs:
+                file_input = media_inputs[0]
+                print(f"  → Media file input found via CSS filter ({len(media_inputs)} candidate(s))")
+        except Exception:
+            pass
+
         try:
-            inputs = driver.find_elements(By.XPATH, "//input[@type='file']")
+            # Dump every file input's attributes in one round-trip, then score in Python
+            inputs = [] if file_input else (driver.execute_script("""
+                return Array.from(document.querySelectorAll("input[type='file']")).map(function (e) {
+                    return {
+                        el: e,
+                        accept: (e.getAttribute('accept') || '').toLowerCase(),
+                        multiple: e.hasAttribute('multiple'),
+                        testid: (e.getAttribute('data-testid') || '').toLowerCase(),
+                        name: (e.getAttribute('name') || '').toLowerCase()
+                    };
+                });
+            """) or [])
             scored = []
-            for idx, inp in enumerate(inputs):
-                try:
-                    accept_attr = (inp.get_attribute('accept') or '').lower()
-                    multiple = inp.get_attribute('multiple')
-                    data_testid = (inp.get_attribute('data-testid') or '').lower()
-                    name_attr = (inp.get_attribute('name') or '').lower()
-
-                    score = 0
-                    # Best: media picker supports videos + multiple selection
-                    if 'video' in accept_attr:
-                        score += 100
-                    if multiple is not None:
-                        score += 50
-                    if 'image' in accept_attr:
-                        score += 20
-
-                    # Hard rejects / penalties
-                    if accept_attr == '':
-                        score -= 200  # very often sticker/new-sticker input
-                    if 'webp' in accept_attr:
-                        score -= 300
-                    if 'sticker' in accept_attr or 'sticker' in data_testid or 'sticker' in name_attr:
-                        score -= 500
-
-                    scored.append((score, idx, inp, accept_attr, bool(multiple)))
-                except:
-                    continue
+            for idx, info in enumerate(inputs):
+                accept_attr = info['accept']
+                multiple = info['multiple']
+
+                score = 0
+                # Best: media picker supports videos + multiple selection
+                if 'video' in accept_attr:
+                    score += 100
+                if multiple:
+                    score += 50
+                if 'image' in accept_attr:
+                    score += 20
+
+                # Hard rejects / penalties
+                if accept_attr == '':
+                    score -= 200  # very often sticker/new-sticker input
+                if 'webp' in accept_attr:
+                    score -= 300
+                if 'sticker' in accept_attr or 'sticker' in info['testid'] or 'sticker' in info['name']:
+                    score -= 500
+
+                scored.append((score, idx, info['el'], accept_attr, multiple))
 
             if scored:
                 scored.sort(key=lambda x: x[0], reverse=True)
@@ -804,156 +1360,60 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         if not file_input:
             print(f"  ✗ ERROR: Could not find a valid media file input for Photos & videos")
             return send_text_fallback()
-        
-        # Step 5: PRE-UPLOAD STICKER CHECK (detect sticker mode BEFORE uploading)
-        print(f"  → Verifying photo mode (not sticker)...")
-        try:
-            sticker_ui = driver.find_elements(By.XPATH,
-                "//span[contains(text(),'Send sticker')] | "
-                "//button[contains(@aria-label,'sticker')] | "
-                "//div[contains(@aria-label, 'sticker') and contains(@aria-label, 'send')] | "
-                "//span[@data-icon='sticker']"
-            )
-            if any(x.is_displayed() for x in sticker_ui):
-                print(f"  ✗ ERROR: STICKER MODE detected before upload!")
-                print(f"      Keyboard navigation failed. Canceling...")
-                from selenium.webdriver.common.action_chains import ActionChains
-                ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-                time.sleep(1)
-                return send_text_fallback()
-            else:
-                print(f"  ✓ Photo mode confirmed (no sticker UI detected)")
-        except Exception as e:
-            print(f"  ⚠️  Could not verify mode: {str(e)}, proceeding anyway...")
+        _file_input_cache[driver.session_id] = file_input
         
         # Step 6: Upload image (no sanitization; use original file)
         print(f"  → Preparing image for upload...")
         try:
-            # Verify file path exists
-            if not os.path.exists(image_path):
-                print(f"  ✗ ERROR: Image file not found: {image_path}")
-                return send_text_fallback()
-
-            abs_image_path = os.path.abspath(image_path)
-            print(f"  → Uploading: {abs_image_path}")
+            # image_path was made absolute and checked for existence in Step 1
+            print(f"  → Uploading: {image_path}")
             
-            file_input.send_keys(abs_image_path)
-            time.sleep(3)  # Wait longer for image to load and preview interface to appear
+            try:
+                file_input.send_keys(image_path)
+            except StaleElementReferenceException:
+                # The cached input was replaced since the last upload - find the current one
+                _file_input_cache.pop(driver.session_id, None)
+                file_input = driver.find_element(By.CSS_SELECTOR, MEDIA_FILE_INPUT_CSS)
+                _file_input_cache[driver.session_id] = file_input
+                file_input.send_keys(image_path)
             
-            # Verify image was actually uploaded by checking for image preview
+            # Verify image was actually uploaded by waiting (up to 6s) for the image preview
             print(f"  → Verifying image upload...")
-            image_uploaded = False
-            for check_attempt in range(6):
-                time.sleep(0.5)
-                previews = driver.find_elements(By.XPATH, 
-                    "//img[contains(@src, 'blob')] | "
-                    "//div[contains(@data-testid, 'media')]//img | "
-                    "//div[contains(@class, 'preview')]//img"
-                )
-                if any(p.is_displayed() for p in previews):
-                    image_uploaded = True
-                    print(f"  ✓ Image preview appeared after {check_attempt + 1} seconds")
-                    break
+            upload_start = time.time()
+            image_uploaded = wait_for_dom(driver, PREVIEW_IMAGE_CSS, timeout=6)
+            if image_uploaded:
+                print(f"  ✓ Image preview appeared after {time.time() - upload_start:.1f} seconds")
             
             if not image_uploaded:
                 print(f"  ⚠️  WARNING: Image preview not found after upload - image may not have uploaded")
                 # Still continue, might be a timing issue
             
-            # Verify we're in photo mode (not sticker mode) by checking for caption input
-            # In sticker mode, there's usually no caption input
-            time.sleep(0.5)  # Reduced wait
-            caption_check = driver.find_elements(By.XPATH, 
-                "//div[@contenteditable='true'][@data-tab='11'] | "
-                "//div[@contenteditable='true'][contains(translate(@placeholder, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'type a message')]"
-            )
-            has_caption_input = any(elem.is_displayed() for elem in caption_check)
-            
-            # Check for sticker indicators
-            sticker_check = driver.find_elements(By.XPATH, 
-                "//div[contains(@aria-label, 'sticker') and contains(@aria-label, 'send')] | "
-                "//span[contains(text(), 'Send sticker')]"
-            )
-            is_sticker_mode = any(elem.is_displayed() for elem in sticker_check)
-            
-            # Check for photo editing tools (indicates photo mode, not sticker)
-            photo_tools = driver.find_elements(By.XPATH, 
-                "//span[@data-icon='crop'] | "  # Crop tool
-                "//span[@data-icon='rotate'] | "  # Rotate tool
-                "//span[@data-icon='filter'] | "  # Filter tool
-                "//div[contains(@aria-label, 'crop')] | "
-                "//div[contains(@aria-label, 'rotate')]"
-            )
-            has_photo_tools = any(tool.is_displayed() for tool in photo_tools)
-            
-            if is_sticker_mode:
+            # Verify we're in photo mode (not sticker mode)
+            # In sticker mode there's a sticker send button and no caption input
+            photo_mode = verify_photo_mode(driver)
+            if photo_mode == 'unknown':
+                print(f"  ⚠️  Photo mode not confirmed yet - interface might still be loading...")
+                # Re-check with exponential backoff (0.2s, 0.4s, 0.8s, 1.6s + jitter):
+                # fast interfaces are confirmed quickly, slow ones still get ~3s
+                for attempt in range(4):
+                    time.sleep(0.2 * (2 ** attempt) * (1 + random.random() * 0.5))
+                    photo_mode = verify_photo_mode(driver)
+                    if photo_mode != 'unknown':
+                        break
+
+            if photo_mode == 'sticker':
                 print(f"  ✗ ERROR: Image uploaded in STICKER mode! Caption input will not appear.")
                 print(f"      This means 'Photos & videos' was not selected correctly.")
                 print(f"      Canceling and sending text only...")
                 # Try pressing Escape to cancel
-                from selenium.webdriver.common.action_chains import ActionChains
                 ActionChains(driver).send_keys(Keys.ESCAPE).perform()
                 time.sleep(1)
                 return send_text_fallback()  # Cancel and send text only
-            
-            # Additional check: Look for photo editing interface (crop, rotate, etc.)
-            # NOTE: Photo editing tools might not appear immediately - they appear when you click the image
-            # OR they might not appear at all in some WhatsApp Web versions
-            # The KEY indicator is: if image preview is visible AND no sticker send button, it's photo mode
-            if not has_photo_tools and not has_caption_input:
-                print(f"  → Photo editing tools not immediately visible - checking image preview...")
-                
-                # Check if image preview is visible (this is the main indicator of photo mode)
-                image_preview_check = driver.find_elements(By.XPATH, 
-                    "//img[contains(@src, 'blob')] | "
-                    "//div[contains(@data-testid, 'media')] | "
-                    "//div[contains(@class, 'preview')]"
-                )
-                image_preview_visible = any(img.is_displayed() for img in image_preview_check)
-                
-                if image_preview_visible and not is_sticker_mode:
-                    print(f"  ✓ Image preview visible and NOT in sticker mode - assuming photo mode")
-                    print(f"  → Proceeding (editing tools may be hidden or appear on click)")
-                    # Don't cancel - proceed with photo mode
-                    has_photo_tools = True  # Set to True to bypass the cancel check
-                elif is_sticker_mode:
-                    print(f"  ✗ ERROR: Sticker mode detected - canceling...")
-                    from selenium.webdriver.common.action_chains import ActionChains
-                    ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-                    time.sleep(1)
-                    return send_text_fallback()
-                else:
-                    print(f"  ⚠️  Image preview not visible - might still be loading...")
-                    # Wait a bit more and check again
-                    time.sleep(2)
-                    image_preview_recheck = driver.find_elements(By.XPATH, 
-                        "//img[contains(@src, 'blob')] | "
-                        "//div[contains(@data-testid, 'media')]"
-                    )
-                    if any(img.is_displayed() for img in image_preview_recheck):
-                        print(f"  ✓ Image preview now visible - proceeding with photo mode")
-                        has_photo_tools = True
-                    else:
-                        print(f"  ⚠️  Image preview still not visible - but proceeding anyway")
-                        # Still proceed - might be a timing issue
-            elif has_photo_tools:
-                print(f"  ✓ Photo mode confirmed (photo editing tools visible)")
-                if not has_caption_input:
-                    print(f"  ⚠️  Caption input not found yet - may still be loading...")
-                else:
-                    print(f"  ✓ Caption input available")
-            elif not has_caption_input:
-                print(f"  ⚠️  Caption input not found - checking if photo mode...")
-                # Check if image preview is visible (should be in both modes)
-                image_preview = driver.find_elements(By.XPATH, 
-                    "//img[contains(@src, 'blob')] | "
-                    "//div[contains(@data-testid, 'media')]//img"
-                )
-                if any(img.is_displayed() for img in image_preview):
-                    print(f"  → Image preview visible, but caption input missing - may be sticker mode")
-                else:
-                    print(f"  → Image preview not visible - interface may still be loading...")
+            elif photo_mode == 'photo':
+                print(f"  ✓ Photo mode confirmed (caption input, editing tools or preview visible)")
             else:
-                print(f"  ✓ Photo mode confirmed (caption input available)")
+                print(f"  ⚠️  Photo mode still not confirmed - but proceeding anyway")
+                # Still proceed - might be a timing issue
         except Exception as e:
             print(f"  ⚠️  Could not upload image: {str(e)}, sending text only")
             return send_text_fallback()
@@ -963,31 +1423,31 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         # Get initial state of contenteditable elements BEFORE image upload
         initial_contenteditables = {}
         try:
-            initial_elems = driver.find_elements(By.XPATH, "//div[@contenteditable='true']")
-            for elem in initial_elems:
-                try:
-                    data_tab = elem.get_attribute('data-tab')
-                    placeholder = elem.get_attribute('placeholder') or ''
-                    initial_contenteditables[data_tab] = placeholder
-                except:
-                    pass
-        except:
+            # One round-trip: [data-tab, placeholder] pairs (missing data-tab stays None, as before)
+            pairs = driver.execute_script("""
+                return Array.from(document.querySelectorAll("div[contenteditable='true']")).map(function (e) {
+                    return [e.getAttribute('data-tab'), e.getAttribute('placeholder') || ''];
+                });
+            """) or []
+            initial_contenteditables = dict((data_tab, placeholder) for data_tab, placeholder in pairs)
+        except Exception:
             pass
         
         # Wait and check for new contenteditable elements or changed attributes
         print(f"  → Checking for caption input to appear...")
         caption_input_found = False
-        for wait_round in range(5):  # Reduced from 12 to 5 seconds
-            time.sleep(0.5)  # Reduced from 1 second to 0.5 seconds
+        # Poll fast at first, then back off (same ~2.5s budget as 5 x 0.5s)
+        caption_poll_delays = [0.1] * 5 + [0.3] * 5 + [0.5]
+        caption_wait_start = time.time()
+        for delay in caption_poll_delays:
+            time.sleep(delay)
             try:
-                current_elems = driver.find_elements(By.XPATH, "//div[@contenteditable='true']")
-                for elem in current_elems:
+                for info in list_contenteditables(driver):
                     try:
-                        if not elem.is_displayed():
+                        if not info['visible']:
                             continue
-                        data_tab = elem.get_attribute('data-tab')
-                        placeholder = str(elem.get_attribute('placeholder') or '').lower()
-                        aria_label = str(elem.get_attribute('aria-label') or '').lower()
+                        data_tab = info['data_tab']
+                        placeholder = info['placeholder'].lower()
                         
                         # Check if this is a NEW element (not in initial set)
                         is_new = data_tab not in initial_contenteditables
@@ -1005,78 +1465,78 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
                         )
                         
                         if (is_new or placeholder_changed or is_caption_like) and data_tab not in ['3']:
-                            print(f"  ✓ Found potential caption input after {wait_round + 1}s (data-tab='{data_tab}', placeholder='{placeholder[:30]}')")
+                            print(f"  ✓ Found potential caption input after {time.time() - caption_wait_start:.1f}s (data-tab='{data_tab}', placeholder='{placeholder[:30]}')")
                             caption_input_found = True
                             break
-                    except:
+                    except Exception:
                         continue
                 if caption_input_found:
                     break
-            except:
+            except Exception:
                 pass
         
         # Try to activate the caption input by interacting with the image preview
         print(f"  → Activating caption input...")
-        try:
-            # Method 1: Click on the image preview itself to activate caption mode
-            image_previews = driver.find_elements(By.XPATH, 
-                "//img[contains(@src, 'blob')] | "
-                "//div[contains(@data-testid, 'media')]//img | "
-                "//div[contains(@class, 'preview')]//img"
-            )
-            for preview in image_previews:
-                if preview.is_displayed():
-                    # Click on the image preview to activate caption input
-                    driver.execute_script("arguments[0].click();", preview)
-                    time.sleep(1)
-                    print(f"  ✓ Clicked image preview to activate caption mode")
-                    # Check if caption input appeared
-                    caption_check = driver.find_elements(By.XPATH, 
-                        "//div[@contenteditable='true'][@data-tab='11'] | "
-                        "//div[@contenteditable='true'][contains(translate(@placeholder, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'type a message')]"
-                    )
-                    if any(elem.is_displayed() for elem in caption_check):
-                        print(f"  ✓ Caption input appeared after clicking image preview")
-                        break
-                    break
-            
-            # Method 2: Click in the footer area below the image (where caption input should be)
-            time.sleep(0.5)
-            footer_area = driver.find_elements(By.XPATH, 
-                "//footer | "
-                "//div[contains(@class, 'footer')] | "
-                "//div[contains(@data-testid, 'conversation-compose')]"
-            )
-            for footer in footer_area:
-                if footer.is_displayed():
-                    # Click in the footer area where caption input should appear
-                    driver.execute_script("arguments[0].click();", footer)
-                    time.sleep(0.5)
-                    print(f"  ✓ Clicked footer area to activate caption input")
-                    break
-            
-            # Method 3: Press Tab key to navigate to caption input
-            from selenium.webdriver.common.action_chains import ActionChains
+
+        def _caption_input_focused():
+            """True if an editable box other than the search box (data-tab='3') has focus"""
+            return driver.execute_script("""
+                var active = document.activeElement;
+                return !!(active && active.isContentEditable && active.getAttribute('data-tab') !== '3');
+            """)
+
+        def _activate_via_preview_click():
+            # Click on the image preview itself to activate caption mode
+            preview = first_visible(driver, PREVIEW_IMAGE_CSS)
+            if preview:
+                driver.execute_script("arguments[0].click();", preview)
+                time.sleep(1)
+                print(f"  ✓ Clicked image preview to activate caption mode")
+                return _caption_input_focused()
+            return False
+
+        def _activate_via_footer_click():
+            # Click in the footer area below the image (where caption input should be)
+            footer = first_visible(driver, FOOTER_CSS)
+            if footer:
+                driver.execute_script("arguments[0].click();", footer)
+                time.sleep(0.5)
+                print(f"  ✓ Clicked footer area to activate caption input")
+                return _caption_input_focused()
+            return False
+
+        def _activate_via_tab():
+            # Press Tab key to navigate to caption input
             for tab_press in range(3):
                 ActionChains(driver).send_keys(Keys.TAB).perform()
                 time.sleep(0.3)
-                # Check if caption input is now focused
-                focused = driver.execute_script("return document.activeElement;")
-                if focused:
-                    data_tab = focused.get_attribute('data-tab')
-                    if data_tab == '11':
-                        print(f"  ✓ Caption input focused via Tab navigation")
+                # Check if caption input is now focused (element + data-tab in one round-trip)
+                focused, data_tab = driver.execute_script(
+                    "var a = document.activeElement; return [a, a && a.getAttribute('data-tab')];")
+                if focused and data_tab == '11':
+                    print(f"  ✓ Caption input focused via Tab navigation")
+                    return True
+            return False
+
+        def _activate_via_message_box():
+            # Click on message box as fallback
+            msg_box = first_visible(driver, MESSAGE_BOX_CSS)
+            if msg_box:
+                driver.execute_script("arguments[0].click(); arguments[0].focus();", msg_box)
+                time.sleep(0.5)
+                print(f"  ✓ Clicked and focused message box to activate caption mode")
+                return _caption_input_focused()
+            return False
+
+        # Stop at the first method that leaves the caption input focused
+        try:
+            if _caption_input_focused():
+                print(f"  ✓ Caption input already focused")
+            else:
+                for activate in (_activate_via_preview_click, _activate_via_footer_click,
+                                 _activate_via_tab, _activate_via_message_box):
+                    if activate():
                         break
-            
-            # Method 4: Click on message box as fallback
-            message_boxes = driver.find_elements(By.XPATH, "//div[@contenteditable='true'][@data-tab='10']")
-            for msg_box in message_boxes:
-                if msg_box.is_displayed():
-                    driver.execute_script("arguments[0].click();", msg_box)
-                    driver.execute_script("arguments[0].focus();", msg_box)
-                    time.sleep(0.5)
-                    print(f"  ✓ Clicked and focused message box to activate caption mode")
-                    break
         except Exception as e:
             print(f"  ⚠️  Error activating caption input: {str(e)}")
         
@@ -1085,63 +1545,55 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         print(f"  → Looking for caption input box (below image preview)...")
         caption_box = None
         
-        # Wait longer for the image preview interface to fully render
-        time.sleep(2)
+        # Wait (up to 2s) for the preview interface to render a caption-like input
+        try:
+            fast_wait(driver, 2, poll_frequency=0.1).until(
+                lambda d: d.find_elements(*CAPTION_READY_LOCATOR)
+            )
+        except TimeoutException:
+            pass
         
         # First, find the image preview container, then look for caption input inside it
         print(f"  → Finding image preview container...")
         media_container = None
-        container_selectors = [
-            "//div[contains(@data-testid, 'media')]",
-            "//div[contains(@class, 'media')]",
-            "//div[contains(@data-testid, 'image')]",
-            "//div[contains(@class, 'preview')]"
-        ]
-        
-        for selector in container_selectors:
-            try:
-                containers = driver.find_elements(By.XPATH, selector)
-                for container in containers:
-                    if container.is_displayed():
-                        # Check if it contains an image
-                        imgs = container.find_elements(By.XPATH, ".//img[contains(@src, 'blob')]")
-                        if imgs:
-                            media_container = container
-                            print(f"  ✓ Found image preview container")
-                            break
-                if media_container:
-                    break
-            except:
-                continue
+        try:
+            # Visible containers that hold a blob image, filtered in the browser (one query)
+            containers = find_visible(driver, MEDIA_CONTAINER_XPATH)
+            if containers:
+                media_container = containers[0]
+                print(f"  ✓ Found image preview container")
+        except Exception:
+            pass
         
         # Try clicking on image preview area to activate caption input
         print(f"  → Clicking on image preview to activate caption input...")
         try:
-            # Find and click the image preview container
-            preview_containers = driver.find_elements(By.XPATH, 
-                "//div[contains(@data-testid, 'media')] | "
-                "//div[contains(@class, 'preview')] | "
-                "//div[contains(@class, 'media-preview')]"
-            )
-            for container in preview_containers:
-                if container.is_displayed():
-                    # Click in the bottom area of the container (where caption input should be)
-                    driver.execute_script("""
-                        var container = arguments[0];
-                        var rect = container.getBoundingClientRect();
-                        // Click in the bottom area where caption input should appear
-                        var x = rect.left + (rect.width / 2);
-                        var y = rect.bottom - 50; // Near bottom of container
-                        var element = document.elementFromPoint(x, y);
-                        if (element) {
-                            element.click();
-                            element.focus();
-                        }
-                    """, container)
-                    time.sleep(1)
-                    print(f"  ✓ Clicked in image preview container to activate caption")
-                    break
-        except:
+            # Find the first visible preview container and focus the element in its bottom area
+            # (where the caption input should be) in a single script. Only an editable element is
+            # focused - a click on anything else can bubble up and close the attachment panel.
+            clicked = driver.execute_script("""
+                var containers = document.querySelectorAll(
+                    "div[data-testid*='media'], div[class*='preview'], div[class*='media-preview']");
+                for (var i = 0; i < containers.length; i++) {
+                    var rect = containers[i].getBoundingClientRect();
+                    if (rect.width === 0 || rect.height === 0) {
+                        continue;
+                    }
+                    var x = rect.left + (rect.width / 2);
+                    var y = rect.bottom - 50; // Near bottom of container
+                    var element = document.elementFromPoint(x, y);
+                    if (element && element.isContentEditable) {
+                        element.focus();
+                        return true;
+                    }
+                    return false;
+                }
+                return false;
+            """)
+            if clicked:
+                time.sleep(1)
+                print(f"  ✓ Focused caption input in image preview container")
+        except WebDriverException:
             pass
         
         # Caption input in the media composer is in the footer ("Type a message").
@@ -1149,67 +1601,73 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         # NOT the normal chat footer (which also has a message box but is in the background).
         print(f"  → Finding caption/message box INSIDE media composer overlay...")
         
+        def _find_caption_in(container):
+            """First visible caption input inside container (one browser round-trip), or None"""
+            return driver.execute_script("""
+                var boxes = arguments[0].querySelectorAll(arguments[1]);
+                for (var i = 0; i < boxes.length; i++) {
+                    var e = boxes[i];
+                    if (e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden') {
+                        return e;
+                    }
+                }
+                return null;
+            """, container, CAPTION_IN_CONTAINER_CSS)
+        
         def _find_caption_in_media_overlay():
             """Find caption box that's inside the same container as the blob preview."""
             try:
-                # Step 1: Find ALL elements that contain blob previews
-                preview_containers = driver.find_elements(
-                    By.XPATH,
-                    "//*[.//img[contains(@src,'blob')]]"
-                )
-                
-                # Step 2: For each preview container, look for a caption box inside it
-                for container in preview_containers:
-                    try:
-                        if not container.is_displayed():
-                            continue
-                        
-                        # Try to find caption box inside this container
-                        caption_boxes = container.find_elements(
-                            By.XPATH,
-                            ".//footer//div[@contenteditable='true'][@data-tab='10'] | "
-                            ".//footer//div[@contenteditable='true'][@data-tab='11'] | "
-                            ".//div[@contenteditable='true'][contains(@aria-placeholder,'message')] | "
-                            ".//div[@contenteditable='true'][contains(@placeholder,'message')]"
-                        )
-                        
-                        for box in caption_boxes:
-                            if box.is_displayed():
-                                return box
-                    except:
-                        continue
-                
-                return None
-            except:
+                # Walk up from each visible blob preview, innermost container first (<html>/<body>
+                # would match the chat footer too), and return the first visible caption input
+                # inside it - every container checked in one browser round-trip
+                return driver.execute_script("""
+                    function visible(e) {
+                        return e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden';
+                    }
+                    var previews = document.querySelectorAll("img[src*='blob']");
+                    for (var p = 0; p < previews.length; p++) {
+                        if (!visible(previews[p])) {
+                            continue;
+                        }
+                        for (var container = previews[p].parentElement; container; container = container.parentElement) {
+                            var boxes = container.querySelectorAll(arguments[0]);
+                            for (var i = 0; i < boxes.length; i++) {
+                                if (visible(boxes[i])) {
+                                    return boxes[i];
+                                }
+                            }
+                        }
+                    }
+                    return null;
+                """, CAPTION_IN_CONTAINER_CSS)
+            except Exception:
                 return None
         
         try:
-            caption_box = WebDriverWait(driver, 20).until(lambda d: _find_caption_in_media_overlay())
-            try:
-                dt = caption_box.get_attribute('data-tab')
-                al = (caption_box.get_attribute('aria-label') or '')[:40]
-                ap = (caption_box.get_attribute('aria-placeholder') or '')[:40]
-                print(f"  ✓ Found caption box INSIDE media overlay (data-tab='{dt}', aria-label='{al}', aria-placeholder='{ap}')")
-            except:
-                print(f"  ✓ Found caption box INSIDE media overlay")
+            caption_box = fast_wait(driver, 20, poll_frequency=0.1).until(lambda d: _find_caption_in_media_overlay())
+            print(f"  ✓ Found caption box INSIDE media overlay")
+            if DEBUG:
+                try:
+                    dt = caption_box.get_attribute('data-tab')
+                    al = (caption_box.get_attribute('aria-label') or '')[:40]
+                    ap = (caption_box.get_attribute('aria-placeholder') or '')[:40]
+                    print(f"    [debug] data-tab='{dt}', aria-label='{al}', aria-placeholder='{ap}'")
+                except WebDriverException:
+                    pass
         except Exception:
             # Fallback to previous heuristic scan
             try:
                 for scan_attempt in range(10):
                     time.sleep(0.5)
-                    candidates = driver.find_elements(By.XPATH, "//footer//div[@contenteditable='true']")
                     best = None
                     best_score = -10_000
-                    for elem in candidates:
+                    for info in list_contenteditables(driver, "footer div[contenteditable='true']"):
                         try:
-                            if not elem.is_displayed():
+                            if not info['visible']:
                                 continue
-                            data_tab = (elem.get_attribute('data-tab') or '')
-                            aria_label = (elem.get_attribute('aria-label') or '')
-                            aria_placeholder = (elem.get_attribute('aria-placeholder') or '')
-                            placeholder = (elem.get_attribute('placeholder') or '')
+                            data_tab = info['data_tab'] or ''
                             score = 0
-                            text_hint = (aria_label + " " + aria_placeholder + " " + placeholder).lower()
+                            text_hint = (info['aria_label'] + " " + info['aria_placeholder'] + " " + info['placeholder']).lower()
                             if "type a message" in text_hint:
                                 score += 1000
                             if data_tab == '10':
@@ -1218,342 +1676,110 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
                                 score -= 1000
                             if score > best_score:
                                 best_score = score
-                                best = elem
-                        except:
+                                best = info['el']
+                        except Exception:
                             continue
                     if best:
                         caption_box = best
                         print(f"  ✓ Using footer caption box (fallback scan)")
                         break
-            except:
+            except Exception:
                 pass
         
-        caption_selectors = [
-            # Look INSIDE media container first (most specific)
-            ".//div[@contenteditable='true'][contains(translate(@placeholder, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'type a message')]",
-            ".//div[@contenteditable='true'][contains(translate(@placeholder, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'message')]",
-            ".//div[@contenteditable='true'][@data-tab='11']",
-            ".//div[@contenteditable='true'][@spellcheck='true']",
-            ".//div[@contenteditable='true']",
-            # Most specific selectors first (global)
-            "//div[@contenteditable='true'][@data-tab='11']",
-            "//div[@contenteditable='true'][@data-testid='media-caption-input-container']",
-            "//div[@contenteditable='true'][@spellcheck='true'][@data-tab='11']",
-            # By placeholder text - "Type a message" (this is what appears below image)
-            "//div[@contenteditable='true'][contains(translate(@placeholder, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'type a message')]",
-            "//div[@contenteditable='true'][contains(translate(@placeholder, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'message')]",
-            "//div[@contenteditable='true'][contains(translate(@placeholder, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'caption')]",
-            # By role and contenteditable
-            "//div[@role='textbox'][@contenteditable='true'][@data-tab='11']",
-            # Look in footer/media areas
-            "//footer//div[@contenteditable='true'][@data-tab='11']",
-            "//div[contains(@class, 'media')]//div[@contenteditable='true'][@data-tab='11']",
-            "//div[contains(@data-testid, 'media')]//div[@contenteditable='true']",
-            # More generic - any contenteditable with data-tab='11' that's visible
-            "//div[@contenteditable='true'][@data-tab='11']"
-        ]
-        
-        # Try to find caption box - prioritize looking inside media container
-        # Wait up to 15 seconds with more attempts
-        for attempt in range(15):
-            # First, try to find caption box INSIDE the media container (most reliable)
-            if media_container:
-                try:
-                    # Look for "Type a message" input inside media container
-                    caption_in_container = media_container.find_elements(By.XPATH, 
-                        ".//div[@contenteditable='true'][contains(translate(@placeholder, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'type a message')] | "
-                        ".//div[@contenteditable='true'][contains(translate(@placeholder, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz'), 'message')] | "
-                        ".//div[@contenteditable='true'][@data-tab='11'] | "
-                        ".//div[@contenteditable='true'][@spellcheck='true']"
-                    )
-                    for elem in caption_in_container:
-                        try:
-                            if elem.is_displayed():
-                                placeholder = str(elem.get_attribute('placeholder') or '').lower()
-                                data_tab = elem.get_attribute('data-tab')
-                                # This should be the caption input below the image
-                                if 'message' in placeholder or 'type' in placeholder or data_tab == '11':
-                                    caption_box = elem
-                                    print(f"  ✓ Found caption box in media container (placeholder='{placeholder[:30]}', data-tab='{data_tab}')")
-                                    break
-                        except:
-                            continue
-                    if caption_box:
-                        break
-                except:
-                    pass
-            
-            # If not found in container, try global selectors
-            for selector in caption_selectors:
-                # Skip selectors that start with "." (those are for container search)
-                if selector.startswith("."):
-                    continue
-                    
-                try:
-                    elements = driver.find_elements(By.XPATH, selector)
-                    for elem in elements:
-                        try:
-                            if not elem.is_displayed():
-                                continue
-                            
-                            # Get attributes to verify it's the caption box
-                            data_tab = elem.get_attribute('data-tab')
-                            placeholder = str(elem.get_attribute('placeholder') or '').lower()
-                            aria_label = str(elem.get_attribute('aria-label') or '').lower()
-                            role = elem.get_attribute('role') or ''
-                            
-                            # Check if image preview is visible first
-                            has_image_preview = False
-                            try:
-                                previews = driver.find_elements(By.XPATH, 
-                                    "//img[contains(@src, 'blob')] | "
-                                    "//div[contains(@data-testid, 'media')]"
-                                )
-                                has_image_preview = any(p.is_displayed() for p in previews)
-                            except:
-                                pass
-                            
-                            # Caption box logic:
-                            # - If image attached: data-tab='10' IS the caption box
-                            # - If no image: data-tab='11' or other caption-specific elements
-                            is_caption_box = (
-                                (data_tab == '10' and has_image_preview) or  # Message box becomes caption when image attached
-                                data_tab == '11' or 
-                                'caption' in placeholder or 
-                                ('message' in placeholder and data_tab not in ['3', '10'])
-                            )
-                            
-                            # Make sure it's not the search box
-                            is_not_search_box = data_tab != '3'
-                            
-                            # Use it if it's a valid caption box and not the search box
-                            if is_caption_box and is_not_search_box:
-                                caption_box = elem
-                                print(f"  ✓ Found caption box (data-tab='{data_tab}', has_image={has_image_preview}, placeholder='{placeholder[:30]}')")
-                                break
-                        except:
-                            continue
-                    if caption_box:
-                        break
-                except:
-                    continue
-            if caption_box:
-                break
-            time.sleep(0.8)  # Wait a bit and try again
         
-        # If still not found, try finding ANY contenteditable that's not message box or search box
+        # Fast path: the usual caption box is a visible data-tab='11' contenteditable (cheap CSS probe)
         if not caption_box:
-            print(f"  → Trying to find any contenteditable in footer area...")
             try:
-                # Get all contenteditable elements in footer
-                footer_elements = driver.find_elements(By.XPATH, 
-                    "//footer//div[@contenteditable='true'] | "
-                    "//div[contains(@class, 'footer')]//div[@contenteditable='true'] | "
-                    "//div[contains(@data-testid, 'conversation-compose')]//div[@contenteditable='true'] | "
-                    "//div[contains(@data-testid, 'media')]//div[@contenteditable='true']"
+                caption_box = fast_wait(driver, 0.9, poll_frequency=0.3).until(
+                    lambda d: first_visible(d, CAPTION_TAB11_CSS)
                 )
-                for elem in footer_elements:
-                    try:
-                        if not elem.is_displayed():
-                            continue
-                        data_tab = elem.get_attribute('data-tab')
-                        # If it's not the main message box (tab 10) or search box (tab 3), try it
-                        if data_tab and data_tab not in ['10', '3']:
-                            # Check if there's an image preview visible - if yes, this might be caption box
-                            previews = driver.find_elements(By.XPATH, 
-                                "//img[contains(@src, 'blob')] | "
-                                "//div[contains(@data-testid, 'media')]"
-                            )
-                            has_preview = any(p.is_displayed() for p in previews)
-                            if has_preview:
-                                caption_box = elem
-                                print(f"  ✓ Found potential caption box (data-tab='{data_tab}') - image preview is visible")
-                                break
-                    except:
-                        continue
-                
-                # If still not found, maybe the caption box appears INSIDE the image preview container
-                # Try to find it near the image preview
-                if not caption_box:
-                    print(f"  → Looking for caption box near image preview...")
-                    try:
-                        # Find image preview first
-                        media_containers = driver.find_elements(By.XPATH,
-                            "//div[contains(@data-testid, 'media')] | "
-                            "//div[contains(@class, 'media')]"
-                        )
-                        for container in media_containers:
-                            if container.is_displayed():
-                                # Look for contenteditable inside this container
-                                caption_in_container = container.find_elements(By.XPATH, ".//div[@contenteditable='true']")
-                                for elem in caption_in_container:
-                                    try:
-                                        if elem.is_displayed():
-                                            data_tab = elem.get_attribute('data-tab')
-                                            if data_tab != '10' and data_tab != '3':
-                                                caption_box = elem
-                                                print(f"  ✓ Found caption box in media container (data-tab='{data_tab}')")
-                                                break
-                                    except:
-                                        continue
-                                if caption_box:
-                                    break
-                    except:
-                        pass
-                
-                # LAST RESORT: Try to find caption input by looking near the send button
-                # The caption input is usually positioned between image thumbnail and send button
-                if not caption_box:
-                    print(f"  → Trying to find caption input near send button...")
-                    try:
-                        # Find send button first
-                        send_buttons = driver.find_elements(By.XPATH, 
-                            "//span[@data-icon='send'] | "
-                            "//button[@aria-label='Send'] | "
-                            "//span[@data-testid='send']"
-                        )
-                        for send_btn in send_buttons:
-                            if send_btn.is_displayed():
-                                # Method 1: Look in the same parent container as send button
-                                parent = driver.execute_script("return arguments[0].parentElement;", send_btn)
-                                if parent:
-                                    # Look for contenteditable in the same container or siblings
-                                    caption_near_send = parent.find_elements(By.XPATH, 
-                                        ".//div[@contenteditable='true'] | "
-                                        ".//preceding-sibling::div[@contenteditable='true'] | "
-                                        ".//following-sibling::div[@contenteditable='true']"
-                                    )
-                                    for elem in caption_near_send:
-                                        try:
-                                            if elem.is_displayed():
-                                                data_tab = elem.get_attribute('data-tab')
-                                                placeholder = str(elem.get_attribute('placeholder') or '').lower()
-                                                # If it's not the main message box and has message placeholder, it's likely caption
-                                                if data_tab != '10' and data_tab != '3':
-                                                    if 'message' in placeholder or data_tab == '11' or not data_tab:
-                                                        caption_box = elem
-                                                        print(f"  ✓ Found caption input near send button (placeholder='{placeholder[:30]}', data-tab='{data_tab}')")
-                                                        break
-                                        except:
-                                            continue
-                                    if caption_box:
-                                        break
-                                
-                                # Method 2: Look in footer area near send button
-                                footer = driver.find_elements(By.XPATH, "//footer | //div[contains(@class, 'footer')]")
-                                for foot in footer:
-                                    if foot.is_displayed():
-                                        # Get all contenteditable in footer, prioritize ones near send button
-                                        footer_inputs = foot.find_elements(By.XPATH, ".//div[@contenteditable='true']")
-                                        for elem in footer_inputs:
-                                            try:
-                                                if elem.is_displayed():
-                                                    data_tab = elem.get_attribute('data-tab')
-                                                    placeholder = str(elem.get_attribute('placeholder') or '').lower()
-                                                    if data_tab != '10' and data_tab != '3':
-                                                        if 'message' in placeholder or data_tab == '11':
-                                                            caption_box = elem
-                                                            print(f"  ✓ Found caption input in footer (placeholder='{placeholder[:30]}', data-tab='{data_tab}')")
-                                                            break
-                                            except:
-                                                continue
-                                        if caption_box:
-                                            break
-                                    if caption_box:
-                                        break
-                    except:
-                        pass
-                
-                # Try keyboard navigation to focus on caption input
-                if not caption_box:
-                    print(f"  → Trying keyboard navigation to find caption input...")
-                    try:
-                        # Press Tab multiple times to navigate to caption input
-                        from selenium.webdriver.common.action_chains import ActionChains
-                        for tab_press in range(5):
-                            ActionChains(driver).send_keys(Keys.TAB).perform()
-                            time.sleep(0.3)
-                            # Check what element is focused
-                            focused = driver.execute_script("return document.activeElement;")
-                            if focused and focused.get_attribute('contenteditable') == 'true':
-                                data_tab = focused.get_attribute('data-tab')
-                                placeholder = str(focused.get_attribute('placeholder') or '').lower()
-                                if data_tab != '10' and data_tab != '3':
-                                    if 'message' in placeholder or data_tab == '11' or not data_tab:
-                                        caption_box = focused
-                                        print(f"  ✓ Found caption input via Tab navigation (placeholder='{placeholder[:30]}', data-tab='{data_tab}')")
-                                        break
-                    except:
-                        pass
-                
-                # Try clicking directly in the area between thumbnail and send button
-                if not caption_box:
-                    print(f"  → Trying to click in caption input area...")
-                    try:
-                        # Find send button to get position
-                        send_buttons = driver.find_elements(By.XPATH, 
-                            "//span[@data-icon='send'] | "
-                            "//button[@aria-label='Send']"
-                        )
-                        if send_buttons:
-                            for send_btn in send_buttons:
-                                if send_btn.is_displayed():
-                                    # Click to the left of send button (where caption input should be)
-                                    driver.execute_script("""
-                                        var btn = arguments[0];
-                                        var rect = btn.getBoundingClientRect();
-                                        // Click to the left of send button, in the middle vertically
-                                        var x = rect.left - 150;
-                                        var y = rect.top + (rect.height / 2);
-                                        var element = document.elementFromPoint(x, y);
-                                        if (element) {
-                                            element.click();
-                                            element.focus();
-                                        }
-                                    """, send_btn)
-                                    time.sleep(1)
-                                    
-                                    # Check if a contenteditable element is now focused
-                                    focused = driver.execute_script("return document.activeElement;")
-                                    if focused and focused.get_attribute('contenteditable') == 'true':
-                                        data_tab = focused.get_attribute('data-tab')
-                                        if data_tab != '10' and data_tab != '3':
-                                            caption_box = focused
-                                            print(f"  ✓ Found caption input by clicking in area (data-tab='{data_tab}')")
-                                            break
-                    except:
-                        pass
+                print(f"  ✓ Found caption box via quick data-tab='11' probe")
+            except WebDriverException:
+                pass
+        
+        def _locate_caption_in_container():
+            """One caption search pass INSIDE the media container (most reliable)"""
+            try:
+                # Look for "Type a message" input inside media container
+                elem = _find_caption_in(media_container)
+                if elem:
+                    print(f"  ✓ Found caption box in media container")
+                    if DEBUG:
+                        print(f"    [debug] data-tab='{elem.get_attribute('data-tab')}'")
+                    return elem
+            except WebDriverException:
+                pass
+            return None
+        
+        def _locate_caption_globally():
+            """One caption search pass over the whole document"""
+            # Try all global selectors in one union query.
+            # The union returns document order, so rank matches to keep the selector priority:
+            # data-tab='11' first, then caption/message placeholders, then data-tab='10' with an image.
+            try:
+                best_rank = None
+                best_match = None
+                # Check if image preview is visible first (once per pass, not per candidate)
+                has_image_preview = False
+                try:
+                    has_image_preview = preview_visible()
+                except WebDriverException:
+                    pass
                 
-                # If caption box still not found, we'll try data-tab='10' as fallback (it's the caption input when image is attached)
-                if not caption_box:
-                    print(f"  ⚠️  Caption box not found - trying to activate it by clicking below image preview...")
-                    try:
-                        # Try clicking directly below the image preview where caption input should appear
-                        previews = driver.find_elements(By.XPATH, 
-                            "//img[contains(@src, 'blob')] | "
-                            "//div[contains(@data-testid, 'media')]"
-                        )
-                        for preview in previews:
-                            if preview.is_displayed():
-                                # Click below the image preview
-                                driver.execute_script("""
-                                    var preview = arguments[0];
-                                    var rect = preview.getBoundingClientRect();
-                                    // Click below the preview, in the middle horizontally
-                                    var x = rect.left + (rect.width / 2);
-                                    var y = rect.bottom + 50; // 50px below the preview
-                                    var element = document.elementFromPoint(x, y);
-                                    if (element) {
-                                        element.click();
-                                        element.focus();
-                                    }
-                                """, preview)
-                                time.sleep(1)
-                                print(f"  ✓ Clicked below image preview to activate caption")
-                                break
-                    except:
-                        pass
-            except:
+                candidates = find_visible(driver, GLOBAL_CAPTION_XPATH)
+                # Get attributes to verify it's the caption box - all candidates in one round-trip
+                attrs = driver.execute_script("""
+                    return arguments[0].map(function(e) {
+                        return [e.getAttribute('data-tab'), e.getAttribute('placeholder') || ''];
+                    });
+                """, candidates) if candidates else []
+                for elem, (data_tab, placeholder) in zip(candidates, attrs):
+                    rank = caption_rank(data_tab, placeholder, has_image_preview)
+                    if rank is None:
+                        continue
+                    if best_rank is None or rank < best_rank:
+                        best_rank = rank
+                        best_match = (elem, data_tab, placeholder)
+                        if rank == 0:
+                            break
+                if best_match:
+                    elem, data_tab, placeholder = best_match
+                    print(f"  ✓ Found caption box (data-tab='{data_tab}', has_image={has_image_preview}, placeholder='{placeholder[:30]}')")
+                    return elem
+            except Exception:
+                pass
+            return None
+        
+        # Try to find caption box, returning as soon as a pass finds it. When the media container
+        # is known the caption must live under it, so only search there (5 polls at 200ms);
+        # otherwise search the whole document for up to 12 seconds
+        if not caption_box:
+            if media_container is not None:
+                caption_wait, locate_caption = fast_wait(driver, 1, poll_frequency=0.2), _locate_caption_in_container
+            else:
+                caption_wait, locate_caption = fast_wait(driver, 12, poll_frequency=0.2), _locate_caption_globally
+            try:
+                caption_box = caption_wait.until(lambda d: locate_caption())
+            except TimeoutException:
+                pass
+        
+        # If still not found, one bounded probe for any other visible contenteditable in the
+        # footer/media area (not the message box, tab 10, or search box, tab 3). The old
+        # Tab-navigation and click-around fallbacks could not create an input the wait above
+        # had missed; if this probe finds nothing, Step 7 tries data-tab='10' or gives up.
+        if not caption_box:
+            print(f"  → Probing for any other contenteditable in footer/media area...")
+            try:
+                elem = first_visible(driver,
+                    "footer div[contenteditable='true']:not([data-tab='10']):not([data-tab='3']), "
+                    "div[data-testid*='media'] div[contenteditable='true']:not([data-tab='10']):not([data-tab='3'])"
+                )
+                if elem and preview_visible():
+                    caption_box = elem
+                    print(f"  ✓ Found potential caption box - image preview is visible")
+                    if DEBUG:
+                        print(f"    [debug] data-tab='{elem.get_attribute('data-tab')}'")
+            except Exception:
                 pass
         
         # Step 7: If caption box not found yet, try using data-tab='10' (when image is attached, it becomes the caption input)
@@ -1562,27 +1788,22 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
             # When image is attached, data-tab='10' IS the caption input
             try:
                 # Check if image is still attached
-                previews = driver.find_elements(By.XPATH, "//img[contains(@src, 'blob')] | //div[contains(@data-testid, 'media')]")
-                has_preview = any(p.is_displayed() for p in previews)
+                has_preview = preview_visible()
                 
                 if has_preview:
                     # Find data-tab='10' - it's the caption input when image is attached
-                    message_boxes = driver.find_elements(By.XPATH, "//footer//div[@contenteditable='true'][@data-tab='10']")
-                    for box in message_boxes:
-                        if box.is_displayed():
-                            caption_box = box
-                            print(f"  ✓ Found caption input: data-tab='10' (message box becomes caption when image attached)")
-                            break
+                    caption_box = first_visible(driver, "footer " + MESSAGE_BOX_CSS)
+                    if caption_box:
+                        print(f"  ✓ Found caption input: data-tab='10' (message box becomes caption when image attached)")
                 
                 if not caption_box:
                     print(f"  ✗ ERROR: Could not find caption input!")
                     print(f"      Canceling image send...")
                     # Cancel the image attachment
                     try:
-                        from selenium.webdriver.common.action_chains import ActionChains
                         ActionChains(driver).send_keys(Keys.ESCAPE).perform()
                         time.sleep(1)
-                    except:
+                    except WebDriverException:
                         pass
                     return send_text_fallback()
             except Exception as e:
@@ -1592,168 +1813,73 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         if caption_box and caption:
             print(f"  → Typing caption in caption box...")
             try:
-                # Verify this is actually the caption box (data-tab='11')
-                data_tab = caption_box.get_attribute('data-tab')
-                if data_tab != '11':
-                    print(f"  ⚠️  Warning: Element data-tab='{data_tab}' might not be caption box")
+                # Diagnostic only: the caption box is usually data-tab='11'
+                if DEBUG:
+                    data_tab = caption_box.get_attribute('data-tab')
+                    if data_tab != '11':
+                        print(f"  ⚠️  Warning: Element data-tab='{data_tab}' might not be caption box")
                 
                 # Verify image preview is still visible before typing
                 print(f"  → Verifying image preview is still visible...")
-                preview_visible = False
+                preview_seen = False
                 try:
-                    previews = driver.find_elements(By.XPATH, 
-                        "//img[contains(@src, 'blob')] | "
-                        "//div[contains(@class, 'preview')] | "
-                        "//div[contains(@data-testid, 'media')]"
-                    )
-                    for preview in previews:
-                        if preview.is_displayed():
-                            preview_visible = True
-                            print(f"  ✓ Image preview is visible")
-                            break
-                except:
+                    preview_seen = preview_visible() or any_visible(driver, "div[class*='preview']")
+                    if preview_seen:
+                        print(f"  ✓ Image preview is visible")
+                except WebDriverException:
                     pass
                 
-                if not preview_visible:
+                if not preview_seen:
                     print(f"  ⚠️  Warning: Image preview not visible, but continuing...")
                 
                 # Use JavaScript to focus and type - this bypasses overlay issues
                 print(f"  → Using JavaScript to type (bypassing overlay)...")
-                driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", caption_box)
-                time.sleep(0.2)
-                
-                # Focus using JavaScript (bypasses click interception) - single attempt is enough
-                driver.execute_script("""
-                    arguments[0].focus();
-                    arguments[0].dispatchEvent(new Event('focus', { bubbles: true }));
-                """, caption_box)
-                time.sleep(0.15)
+                # Scroll, focus and dispatch focus (bypasses click interception) in one script;
+                # retry once if the caption box did not end up focused
+                for focus_try in range(2):
+                    focused = driver.execute_script("""
+                        var e = arguments[0];
+                        e.scrollIntoView({block: 'center'});
+                        e.focus();
+                        e.dispatchEvent(new Event('focus', { bubbles: true }));
+                        return document.activeElement === e;
+                    """, caption_box)
+                    if focused:
+                        break
+                    time.sleep(0.15)
                 
                 # Always use JavaScript to type (bypasses overlay and works with emojis)
                 # IMPORTANT: Don't clear the element if image preview is visible - just append/type
                 print(f"  → Setting caption text via JavaScript...")
                 
                 # Check if image preview is still visible before typing
-                previews_before = driver.find_elements(By.XPATH, 
-                    "//img[contains(@src, 'blob')] | "
-                    "//div[contains(@data-testid, 'media')]"
-                )
-                preview_visible_before = any(p.is_displayed() for p in previews_before)
-                
-                if preview_visible_before:
+                if preview_visible():
                     print(f"  ✓ Image preview still visible, typing caption in footer message box...")
-                    # IMPORTANT: Use pure JS (no .click()) to avoid "Add file" button interception
-                    # Check if caption box already has content - if yes, clear it FIRST
-                    existing_text = driver.execute_script("return arguments[0].textContent || arguments[0].innerText || '';", caption_box)
-                    if existing_text and len(existing_text.strip()) > 0:
-                        print(f"  ⚠️  Caption box already has {len(existing_text)} chars - clearing before typing...")
-                    
-                    driver.execute_script("""
-                        var elem = arguments[0];
-                        var text = arguments[1] || '';
-                        
-                        // Scroll into view and focus (NO physical click)
-                        elem.scrollIntoView({block:'center', inline:'center'});
-                        elem.focus();
-                        
-                        // Step 1: CLEAR completely - try multiple methods
-                        try {
-                            // Clear via innerHTML (most aggressive for Lexical editor)
-                            elem.innerHTML = '';
-                        } catch(e) {}
-                        
-                        try {
-                            // Also clear text properties
-                            elem.textContent = '';
-                            elem.innerText = '';
-                        } catch(e) {}
-                        
-                        try {
-                            // Select all and delete using execCommand
-                            var range = document.createRange();
-                            range.selectNodeContents(elem);
-                            var selection = window.getSelection();
-                            selection.removeAllRanges();
-                            selection.addRange(range);
-                            document.execCommand('delete', false, null);
-                        } catch(e) {}
-                        
-                        // Refocus after clearing
-                        elem.focus();
-                        
-                        // Step 2: Insert text with proper newline handling
-                        // Split by newlines and insert each line, using Shift+Enter for line breaks
-                        var lines = text.split('\\n');
-                        for (var i = 0; i < lines.length; i++) {
-                            if (i > 0) {
-                                // Insert newline using Shift+Enter (WhatsApp's way of creating line breaks)
-                                var shiftEnterEvent = new KeyboardEvent('keydown', {
-                                    key: 'Enter',
-                                    code: 'Enter',
-                                    keyCode: 13,
-                                    which: 13,
-                                    shiftKey: true,
-                                    bubbles: true,
-                                    cancelable: true
-                                });
-                                elem.dispatchEvent(shiftEnterEvent);
-                                
-                                // Also dispatch keyup
-                                var keyupEvent = new KeyboardEvent('keyup', {
-                                    key: 'Enter',
-                                    code: 'Enter',
-                                    keyCode: 13,
-                                    which: 13,
-                                    shiftKey: true,
-                                    bubbles: true
-                                });
-                                elem.dispatchEvent(keyupEvent);
-                            }
-                            
-                            // Insert the line text (if not empty)
-                            if (lines[i]) {
-                                try {
-                                    document.execCommand('insertText', false, lines[i]);
-                                } catch(e) {}
-                            }
-                        }
-                        
-                        elem.focus();
-                    """, caption_box, caption)
-                    time.sleep(0.4)  # Reduced from 0.8
-                else:
-                    # No image preview, safe to clear
-                    driver.execute_script("""
-                        var elem = arguments[0];
-                        var text = arguments[1];
-                        elem.focus();
-                        elem.textContent = '';
-                        elem.innerText = '';
-                        elem.textContent = text;
-                        elem.innerText = text;
-                        var inputEvent = new InputEvent('input', {
-                            bubbles: true,
-                            cancelable: true,
-                            inputType: 'insertText',
-                            data: text
-                        });
-                        elem.dispatchEvent(inputEvent);
-                        elem.focus();
-                    """, caption_box, caption)
                 
-                time.sleep(0.5)  # Reduced from 1 - Wait for caption to be set
+                # IMPORTANT: Use pure JS (no .click()) to avoid "Add file" button interception.
+                # Clear, type and verify (caption length + image preview still attached) in one call;
+                # longer or emoji captions are pasted in one event, typing is the fallback
+                result = {}
+                if len(caption) >= PASTE_MIN_LENGTH or NON_BMP_RE.search(caption):
+                    result = paste_text(driver, caption_box, caption, PREVIEW_CSS)
+                if not result.get('length'):
+                    result = driver.execute_script(INSERT_TEXT_JS, caption_box, caption, PREVIEW_CSS) or {}
+                if result.get('previousLength'):
+                    print(f"  ⚠️  Caption box already had {result['previousLength']} chars - cleared before typing")
                 
-                # Verify caption was typed AND image preview is still there
-                caption_text = driver.execute_script("return arguments[0].textContent || arguments[0].innerText;", caption_box)
-                previews_after = driver.find_elements(By.XPATH, 
-                    "//img[contains(@src, 'blob')] | "
-                    "//div[contains(@data-testid, 'media')]"
-                )
-                preview_visible_after = any(p.is_displayed() for p in previews_after)
+                caption_length = result.get('length', 0)
+                if not caption_length:
+                    try:
+                        # Editor may apply the text asynchronously - wait (up to 0.5s) for it
+                        caption_length = fast_wait(driver, 0.5).until(lambda d: d.execute_script(
+                            "return (arguments[0].textContent || '').trim().length;", caption_box))
+                    except TimeoutException:
+                        pass
                 
-                if caption_text and len(caption_text.strip()) > 0:
-                    if preview_visible_after:
-                        print(f"  ✓ Caption typed successfully ({len(caption_text)} chars) - Image preview still attached")
+                # Verify caption was typed AND image preview is still there
+                if caption_length:
+                    if result.get('previewVisible'):
+                        print(f"  ✓ Caption typed successfully ({caption_length} chars) - Image preview still attached")
                     else:
                         print(f"  ⚠️  Warning: Caption typed but image preview might be lost!")
                 else:
@@ -1764,10 +1890,9 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
                 # Don't send without caption - cancel and send text instead
                 print(f"  → Canceling image send (Mode 2) - NOT sending text-only...")
                 try:
-                    from selenium.webdriver.common.action_chains import ActionChains
                     ActionChains(driver).send_keys(Keys.ESCAPE).perform()
                     time.sleep(0.8)
-                except:
+                except WebDriverException:
                     pass
                 return False
         
@@ -1778,32 +1903,21 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         
         try:
             # Check if image preview is still visible
-            previews = driver.find_elements(By.XPATH, 
-                "//img[contains(@src, 'blob')] | "
-                "//div[contains(@class, 'preview')] | "
-                "//div[contains(@data-testid, 'media')]"
-            )
-            for preview in previews:
-                if preview.is_displayed():
-                    image_ready = True
-                    print(f"  ✓ Image preview is visible")
-                    break
+            if preview_visible() or any_visible(driver, "div[class*='preview']"):
+                image_ready = True
+                print(f"  ✓ Image preview is visible")
             
             if not image_ready:
                 print(f"  ⚠️  Warning: Image preview not found! Image might be lost.")
             
-            # Verify caption is still in caption/message box
+            # The caption length was already reported by the typing script in Step 7;
+            # only read the box back again when debugging
             if caption_box and caption:
-                caption_text = driver.execute_script("return arguments[0].textContent || arguments[0].innerText;", caption_box)
-                if caption_text and len(caption_text.strip()) > 0:
-                    caption_ready = True
-                    print(f"  ✓ Caption is ready ({len(caption_text)} chars)")
-                else:
-                    # Caption might be in WhatsApp's internal format (wrapped in spans, etc.)
-                    # Assume it's already typed successfully if we got here
-                    print(f"  → Caption verification skipped (already typed successfully)")
-                    caption_ready = True
-        except:
+                caption_ready = True
+                if DEBUG:
+                    caption_text = driver.execute_script("return arguments[0].textContent || arguments[0].innerText;", caption_box)
+                    print(f"    [debug] Caption box holds {len((caption_text or '').strip())} chars before send")
+        except Exception:
             pass
         
         if not image_ready:
@@ -1819,27 +1933,34 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         # First, ensure caption box is focused using JavaScript (no clicks to avoid overlay)
         if caption_box:
             try:
-                # Focus using JavaScript only
-                driver.execute_script("arguments[0].focus();", caption_box)
-                time.sleep(0.3)
+                def _caption_focused(d):
+                    # Compared in the browser, no element reference round-trip
+                    return d.execute_script("return document.activeElement === arguments[0];", caption_box)
                 
-                # Verify focus
-                active_elem = driver.execute_script("return document.activeElement;")
-                if active_elem != caption_box:
+                # Focus using JavaScript only, then verify focus (up to 0.3s)
+                driver.execute_script("arguments[0].focus();", caption_box)
+                try:
+                    fast_wait(driver, 0.3).until(_caption_focused)
+                except TimeoutException:
                     print(f"  ⚠️  Focus not on caption box, refocusing...")
                     driver.execute_script("arguments[0].focus();", caption_box)
-                    time.sleep(0.3)
+                    try:
+                        fast_wait(driver, 0.3).until(_caption_focused)
+                    except TimeoutException:
+                        pass
                 
                 print(f"  ✓ Caption box focused")
-            except:
+            except Exception:
                 pass
         
         # Check if image preview is still visible
-        previews = driver.find_elements(By.XPATH, 
-            "//img[contains(@src, 'blob')] | "
-            "//div[contains(@data-testid, 'media')]"
-        )
-        has_preview = any(p.is_displayed() for p in previews)
+        has_preview = preview_visible()
+        
+        # Outgoing bubbles before sending, so the new one (and its server ack) can be recognised
+        try:
+            sent_before = outgoing_state(driver)[0]
+        except WebDriverException:
+            sent_before = None
         
         if has_preview and caption_box:
             print(f"  → Image preview visible, sending via media composer...")
@@ -1853,42 +1974,63 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
                     Find the *media composer* send button (not the normal chat send button).
                     Search INSIDE the same media overlay container that has the blob preview.
                     """
+                    # Reuse the button found on an earlier try while it is still attached and enabled
+                    cached = _send_button_cache.get(contact_number)
+                    if cached is not None:
+                        try:
+                            if driver.execute_script("return arguments[0].isConnected && !arguments[0].disabled;", cached):
+                                return cached
+                        except Exception:
+                            pass
+                        _send_button_cache.pop(contact_number, None)
+                    
                     try:
-                        # Find containers with blob previews (same strategy as caption box finding)
-                        preview_containers = driver.find_elements(
-                            By.XPATH,
-                            "//*[.//img[contains(@src,'blob')]]"
-                        )
-                        
-                        # Look for send button inside each preview container
-                        for container in preview_containers:
-                            try:
-                                if not container.is_displayed():
-                                    continue
-                                
-                                # Search for send button inside this media overlay
-                                send_selectors = [
-                                    ".//button[@aria-label='Send']",
-                                    ".//span[@data-icon='send']/ancestor::button[1]",
-                                    ".//span[@data-testid='send']/ancestor::button[1]",
-                                    ".//div[@role='button'][.//span[@data-icon='send']]",
-                                    ".//*[@data-testid='send']/ancestor::button[1]",
-                                    ".//*[@aria-label='Send']",
-                                ]
-                                
-                                for sel in send_selectors:
-                                    try:
-                                        buttons = container.find_elements(By.XPATH, sel)
-                                        for btn in buttons:
-                                            if btn.is_displayed() and btn.is_enabled():
-                                                return btn
-                                    except:
-                                        continue
-                            except:
-                                continue
-                        
-                        return None
-                    except:
+                        # Walk up from each visible blob preview (innermost container first, same
+                        # strategy as caption box finding) and return the first visible, enabled
+                        # send button inside it - all in one browser round-trip
+                        button = driver.execute_script("""
+                            var locators = arguments[0];
+                            function visible(e) {
+                                return e.getClientRects().length > 0 && getComputedStyle(e).visibility !== 'hidden';
+                            }
+                            function find(container, locator) {
+                                var matches = [];
+                                if (locator[0] === 'xpath') {
+                                    var result = document.evaluate(locator[1], container, null,
+                                                                   XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+                                    for (var i = 0; i < result.snapshotLength; i++) {
+                                        matches.push(result.snapshotItem(i));
+                                    }
+                                } else {
+                                    matches = Array.from(container.querySelectorAll(locator[1]));
+                                }
+                                for (var j = 0; j < matches.length; j++) {
+                                    if (visible(matches[j]) && !matches[j].disabled) {
+                                        return matches[j];
+                                    }
+                                }
+                                return null;
+                            }
+                            var previews = document.querySelectorAll("img[src*='blob']");
+                            for (var p = 0; p < previews.length; p++) {
+                                if (!visible(previews[p])) {
+                                    continue;
+                                }
+                                for (var container = previews[p].parentElement; container; container = container.parentElement) {
+                                    for (var k = 0; k < locators.length; k++) {
+                                        var btn = find(container, locators[k]);
+                                        if (btn) {
+                                            return btn;
+                                        }
+                                    }
+                                }
+                            }
+                            return null;
+                        """, [list(locator) for locator in MEDIA_SEND_LOCATORS])
+                        if button is not None:
+                            _send_button_cache[contact_number] = button
+                        return button
+                    except WebDriverException:
                         return None
 
                 def _composer_open():
@@ -1896,56 +2038,56 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
                     Detect whether the media composer overlay is still open.
                     DO NOT use the chat's 'Add file' button (it exists even when composer is closed).
                     """
-                    # 1) If caption_box is still attached & visible, composer is open
+                    # Open if caption_box is still attached & visible, or a dialog-like media
+                    # overlay still shows a blob preview (both checked in one script)
                     try:
-                        if caption_box and caption_box.is_displayed():
-                            return True
+                        return driver.execute_script("""
+                            function visible(e) {
+                                return e.isConnected && e.getClientRects().length > 0 &&
+                                       getComputedStyle(e).visibility !== 'hidden';
+                            }
+                            return !!((arguments[0] && visible(arguments[0])) ||
+                                      Array.prototype.some.call(document.querySelectorAll(arguments[1]), visible));
+                        """, caption_box, COMPOSER_PREVIEW_CSS)
                     except Exception:
                         pass
 
-                    # 2) Look for a dialog-like media overlay with a blob preview
+                    # caption_box went stale: only the overlay check is left
                     try:
-                        overlay_previews = driver.find_elements(
-                            By.XPATH,
-                            "//div[@role='dialog']//img[contains(@src,'blob')] | "
-                            "//div[@role='dialog']//div[contains(@data-testid,'media')]"
-                        )
-                        if any(p.is_displayed() for p in overlay_previews):
-                            return True
+                        return any_visible(driver, COMPOSER_PREVIEW_CSS)
                     except Exception:
-                        pass
-
-                    return False
+                        return False
 
                 # Try sending up to 3 times, verify by composer closing
                 for send_try in range(3):
-                    send_button = _find_media_send_button()
-                    if not send_button:
+                    # Poll for the button (up to 2s) rather than a fixed pause between tries
+                    try:
+                        send_button = fast_wait(driver, 2, poll_frequency=0.1).until(
+                            lambda d: _find_media_send_button())
+                    except TimeoutException:
                         print(f"  ⚠️  Media send button not found (try {send_try+1}/3)")
-                        time.sleep(0.6)
                         continue
 
                     print(f"  → Clicking media send button (try {send_try+1}/3)...")
                     try:
-                        driver.execute_script("arguments[0].scrollIntoView({block:'center',inline:'center'});", send_button)
-                    except Exception:
-                        pass
-                    try:
-                        driver.execute_script("arguments[0].click();", send_button)
+                        # Scroll and click in one round-trip (no Selenium actionability checks)
+                        driver.execute_script(
+                            "arguments[0].scrollIntoView({block:'center',inline:'center'}); arguments[0].click();",
+                            send_button)
                     except Exception:
                         try:
                             send_button.click()
                         except Exception:
                             pass
+                    reset_preview_cache()
 
                     # The send button may morph into a spinner/disabled state after click.
-                    # So: wait longer for composer to close, and only re-click if still open.
-                    closed = False
-                    for _ in range(120):  # up to 60s
-                        time.sleep(0.5)
-                        if not _composer_open():
-                            closed = True
-                            break
+                    # So: wait longer for composer to close (polled in the browser, up to 60s),
+                    # and only re-click if still open.
+                    try:
+                        closed = wait_preview_gone(driver, caption_box, timeout=60)
+                    except Exception:
+                        closed = not _composer_open()
                     if closed:
                         sent = True
                         print(f"  ✓ Image sent! (media composer closed)")
@@ -1953,14 +2095,16 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
                     else:
                         print(f"  ⚠️  Still in media composer after click (may still be uploading) - retrying send...")
 
+                # The composer (and its send button) is gone or being discarded either way
+                _send_button_cache.pop(contact_number, None)
+
                 # If still not sent, cancel attachment BEFORE falling back to text-only
                 if not sent and _composer_open():
                     try:
-                        from selenium.webdriver.common.action_chains import ActionChains
                         ActionChains(driver).send_keys(Keys.ESCAPE).perform()
                         time.sleep(0.8)
                         print(f"  → Canceled attachment (Escape) before fallback")
-                    except:
+                    except WebDriverException:
                         pass
             except Exception as e:
                 print(f"  ⚠️  Send method failed: {str(e)}")
@@ -1971,111 +2115,386 @@ def send_image_with_caption(driver, message_box, image_path, caption, contact_nu
         
         # Step 10: Verify and cleanup
         if sent:
-            time.sleep(3)  # Wait for WhatsApp to fully process the image
+            # Wait for the new image bubble to get its first tick - the server has acknowledged it
+            # over the WebSocket - instead of a fixed 3s pause (uploads can take a while: up to 30s)
+            if sent_before is not None:
+                try:
+                    fast_wait(driver, 30, poll_frequency=0.2).until(
+                        lambda d: (lambda state: state[0] > sent_before and state[1])(outgoing_state(d)))
+                except TimeoutException:
+                    print(f"  ⚠️  Delivery tick not seen yet - continuing")
+            else:
+                time.sleep(3)
             clear_attachment_preview(driver)
-            time.sleep(1)
+            reset_preview_cache()
             
             print(f"✓ Image with caption sent to {contact_number}")
-            time.sleep(delay_seconds)
             return True
         else:
             print(f"  ✗ Could not send image (send button not found)")
             # Close media composer if still open, but do NOT send text-only
             try:
-                from selenium.webdriver.common.action_chains import ActionChains
                 ActionChains(driver).send_keys(Keys.ESCAPE).perform()
                 time.sleep(0.8)
-            except:
+            except WebDriverException:
                 pass
             return False
         
     except Exception as e:
         print(f"  ⚠️  Error sending image: {str(e)}")
         try:
-            from selenium.webdriver.common.action_chains import ActionChains
             ActionChains(driver).send_keys(Keys.ESCAPE).perform()
             time.sleep(0.8)
-        except:
+        except WebDriverException:
             pass
         return False
 
 
-def send_whatsapp_message(driver, contact_number, message, delay_seconds=15, image_path=None):
+def select_contact(driver, contact_number, timeout=15):
     """
-    Simple WhatsApp message sender:
-    1. Search contact
-    2. Auto select
-    3. Auto type message (or send image with caption if image_path provided)
-    4. Auto send
+    Search for a contact from the main page, open their chat and return its message box
+    
+    Args:
+        driver: Selenium WebDriver instance
+        contact_number: Phone number or name to search for
+        timeout: Seconds shared by all waits and fallbacks below, so an unknown number fails
+                 within this budget instead of timing out once per fallback
+    
+    Returns:
+        The chat's message box WebElement, or None if the contact could not be opened
     """
-    from selenium.webdriver.common.action_chains import ActionChains
+    deadline = time.monotonic() + timeout
+    
+    def _remaining(cap=None):
+        left = deadline - time.monotonic()
+        return left if cap is None else min(cap, left)
     
+    # Ensure we're on main page
+    ensure_main_page(driver)
+    
+    # Step 1: Search contact
+    search_query = contact_number.translate(PHONE_STRIP_TABLE)
+    
+    print(f"  → Searching for contact...")
+    # Find search box
     try:
-        # Ensure we're on main page
-        ensure_main_page(driver)
-        time.sleep(0.2)
-        
-        # Step 1: Search contact
-        search_query = contact_number.replace(" ", "").replace("-", "").replace("(", "").replace(")", "")
-        
-        print(f"  → Searching for contact...")
-        # Find search box
+        search_box = fast_wait(driver, max(1, _remaining()), poll_frequency=0.1).until(
+            EC.element_to_be_clickable(SEARCH_BOX_LOCATOR)
+        )
+    except TimeoutException:
+        print(f"  ✗ Error: Could not find search box (timeout)")
+        return None
+    
+    # What is on screen now, to recognise the search results and the new chat when they render
+    try:
+        first_before = first_visible(driver, CHAT_RESULT_CSS)
+        chat_before = first_visible(driver, CONVERSATION_PANEL_CSS)
+    except WebDriverException:
+        first_before = chat_before = None
+    
+    # Clear and type search query
+    search_box.click()
+    search_box.send_keys(Keys.CONTROL, 'a', Keys.NULL, Keys.BACKSPACE, search_query)
+    
+    # Wait for results: the chat list is replaced by search results (up to 2s)
+    try:
+        fast_wait(driver, max(0.1, _remaining(cap=2)), poll_frequency=0.1).until(
+            lambda d: (lambda first: first is not None and first != first_before)(
+                first_visible(d, CHAT_RESULT_CSS))
+        )
+    except TimeoutException:
+        pass
+    
+    def _chat_opened(d):
+        # A new conversation panel replaced the previous one (or the first one appeared)
+        if chat_before is not None:
+            return EC.staleness_of(chat_before)(d)
+        return any_visible(d, MESSAGE_BOX_CSS)
+    
+    # Step 2: Auto select first result
+    print(f"  → Selecting contact...")
+    try:
+        # Press Arrow Down + Enter to select first result (both keys in one WebDriver call)
+        search_box.send_keys(Keys.ARROW_DOWN, Keys.ENTER)
+        try:
+            fast_wait(driver, max(0.1, _remaining(cap=3)), poll_frequency=0.1).until(_chat_opened)
+        except TimeoutException:
+            pass  # Same chat as before, or slow - the message box lookup below still waits
+    except Exception as e:
+        # Fallback: Click first result (within whatever is left of the budget)
+        if _remaining() <= 0:
+            print(f"  ✗ Error: Could not select contact within {timeout}s")
+            return None
         try:
-            search_box = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//div[@contenteditable='true'][@data-tab='3']"))
+            first_result = fast_wait(driver, _remaining(cap=5), poll_frequency=0.1).until(
+                EC.element_to_be_clickable(FIRST_CHAT_RESULT_LOCATOR)
             )
+            first_result.click()
+            try:
+                fast_wait(driver, max(0.1, _remaining(cap=3)), poll_frequency=0.1).until(_chat_opened)
+            except TimeoutException:
+                pass
+        except Exception as e2:
+            print(f"  ✗ Error: Could not select contact - {str(e2) if str(e2) else type(e2).__name__}")
+            return None
+    
+    # The previous chat is still open after a send: if the search didn't replace it (unknown
+    # number, no result, or too slow), its message box must not be used for this contact
+    if chat_before is not None and _open_chat.get(driver.session_id) != search_query:
+        try:
+            switched = _chat_opened(driver)
+        except WebDriverException:
+            switched = False
+        if not switched:
+            print(f"  ✗ Error: No chat opened for this number (not on WhatsApp or no search result)")
+            return None
+    
+    # Step 3: Find message box
+    print(f"  → Finding message box...")
+    
+    # Find message box using multiple selectors
+    message_box = get_fresh_message_box(driver, max_retries=5, deadline=deadline)
+    if not message_box:
+        print(f"  ✗ Error: Could not find message box")
+        return None
+    
+    _open_chat[driver.session_id] = search_query
+    return message_box
+
+
+def send_text(driver, message_box, message):
+    """
+    Type a text message into an open chat and send it
+    
+    Args:
+        driver: Selenium WebDriver instance
+        message_box: The chat's message box WebElement
+        message: Message text (may contain emojis / non-BMP characters)
+    
+    Returns:
+        True if the message was sent, False otherwise
+    """
+    # Step 4: Auto type message
+    print(f"  → Typing message...")
+    
+    # Reuse the message box unless it went stale
+    message_box = refresh_if_stale(driver, message_box, max_retries=3)
+    if not message_box:
+        print(f"  ✗ Error: Message box became unavailable")
+        return False
+    
+    # Focus message box - use ActionChains for reliable clicking
+    try:
+        ActionChains(driver).move_to_element(message_box).click().perform()
+        time.sleep(0.2)  # Reduced from 0.5
+    except Exception:
+        try:
+            message_box.click()
+            time.sleep(0.2)  # Reduced from 0.5
+        except Exception:
+            driver.execute_script("arguments[0].focus(); arguments[0].click();", message_box)
+            time.sleep(0.2)  # Reduced from 0.5
+    
+    # Outgoing bubbles before sending, so the new one can be told apart from earlier messages
+    try:
+        sent_before = outgoing_state(driver)[0]
+    except WebDriverException:
+        sent_before = None
+    
+    # Check if message contains non-BMP characters (emojis, etc.)
+    # ChromeDriver send_keys() only supports BMP characters
+    has_non_bmp = NON_BMP_RE.search(message) is not None
+    typed_via_js = has_non_bmp
+    clicked_send = False
+    
+    # send_keys would turn '\n' into Enter and send each line as its own message
+    multiline = '\n' in message
+    
+    def _insert_via_cdp():
+        # Single-line text: clear, then insert the whole message as one trusted DevTools text input.
+        # True once the box holds text (ready to send)
+        if multiline:
+            return False
+        try:
+            message_box.send_keys(Keys.CONTROL, 'a', Keys.NULL, Keys.DELETE)
+        except WebDriverException:
+            return False
+        if not insert_text_cdp(driver, message):
+            return False
+        try:
+            fast_wait(driver, 1, poll_frequency=0.05).until(
+                lambda d: d.execute_script("return (arguments[0].textContent || '').trim().length;", message_box))
+            return True
         except TimeoutException:
-            print(f"  ✗ Error: Could not find search box (timeout)")
+            return False
+    
+    # Emoji, multi-line or longer text: try a single paste first (no per-character key events)
+    pasted = False
+    if has_non_bmp or multiline or len(message) >= PASTE_MIN_LENGTH:
+        pasted = bool(paste_text(driver, message_box, message).get('length'))
+        if pasted:
+            typed_via_js = True
+            print(f"  → Pasted message ({len(message)} chars)")
+    
+    if pasted:
+        time.sleep(0.2)
+    elif has_non_bmp and _insert_via_cdp():
+        print(f"  → Inserted emoji message via DevTools Input.insertText")
+    elif has_non_bmp:
+        # Use JavaScript for messages with emojis/special characters
+        print(f"  → Using JavaScript for emoji/special characters...")
+        # Use the set_message_text_js function (it clears the box itself)
+        if not set_message_text_js(driver, message_box, message):
+            if multiline:
+                print(f"  ✗ Error: Could not enter the multi-line message")
+                return False
+            print(f"  ⚠ Warning: JavaScript text setting had issues, trying alternative...")
+            # Alternative: the shared one-call clear + type script
+            driver.execute_script(INSERT_TEXT_JS, message_box, message, None)
+        time.sleep(0.4)  # Reduced from 0.8
+    elif multiline:
+        # Multi-line text the paste didn't take: type it line by line with real Shift+Enter key
+        # presses. Script-dispatched Shift+Enter is ignored, and send_keys would turn each '\n'
+        # into Enter and send every line as its own message
+        print(f"  → Typing multi-line message with Shift+Enter line breaks...")
+        if not set_message_text_js(driver, message_box, message):
+            print(f"  ✗ Error: Could not enter the multi-line message")
+            return False
+        typed_via_js = True
+    elif len(message) >= JS_TYPING_MIN_LENGTH:
+        # Long single-line text: clear, insert and click send in one DOM operation
+        # rather than one key event per character
+        print(f"  → Inserting and sending message ({len(message)} chars) via JavaScript...")
+        result = set_message_and_send(driver, message_box, message)
+        typed_via_js = bool(result.get('length'))
+        clicked_send = bool(result.get('clicked'))
+        if not typed_via_js:
+            print(f"  ⚠️  JavaScript insert left the box empty, typing instead...")
+            message_box.send_keys(message)
+            time.sleep(0.4)
+    elif not _insert_via_cdp():
+        # Use real keyboard input for regular text (when DevTools insertText isn't available)
+        # Clear any existing text (select all + delete as one chord; Keys.NULL releases Ctrl)
+        message_box.send_keys(Keys.CONTROL, 'a', Keys.NULL, Keys.BACKSPACE)
+        
+        # Type message using real keyboard input
+        message_box.send_keys(message)
+        time.sleep(0.4)  # Wait for message to be fully typed (reduced from 0.8)
+    
+    # Step 5: Auto send
+    print(f"  → Sending message...")
+    
+    def _box_empty(d):
+        try:
+            return not d.execute_script("return (arguments[0].textContent || '').trim().length;", message_box)
+        except StaleElementReferenceException:
+            return True  # Composer re-rendered after the send
+    
+    # Already sent by the fused insert + send script? The box empties once the message is queued
+    if clicked_send:
+        try:
+            fast_wait(driver, 1, poll_frequency=0.1).until(_box_empty)
+        except TimeoutException:
+            clicked_send = False
+            print(f"  ⚠️  Send button click didn't go through, pressing Enter...")
+    
+    if not clicked_send:
+        # Make sure the message box is still attached before sending (re-find only if stale)
+        message_box = refresh_if_stale(driver, message_box, max_retries=2)
+        if not message_box:
+            print(f"  ✗ Error: Could not find message box to send")
             return False
         
-        # Clear and type search query
-        search_box.click()
-        time.sleep(0.1)
-        search_box.send_keys(Keys.CONTROL + "a")
-        search_box.send_keys(Keys.BACKSPACE)
-        time.sleep(0.1)
-        search_box.send_keys(search_query)
-        time.sleep(1)  # Wait for results (reduced from 2)
-        
-        # Step 2: Auto select first result
-        print(f"  → Selecting contact...")
+        # Ensure message box is focused before sending
         try:
-            # Press Arrow Down + Enter to select first result
-            search_box.send_keys(Keys.ARROW_DOWN)
-            time.sleep(0.1)
-            search_box.send_keys(Keys.ENTER)
-            time.sleep(1.5)  # Wait for chat to open (reduced from 2.5)
+            message_box.click()
+            time.sleep(0.1)  # Reduced from 0.3
+        
+            # Try sending with Enter key; the box empties as soon as the message is queued
+            message_box.send_keys(Keys.ENTER)
+            try:
+                fast_wait(driver, 1, poll_frequency=0.1).until(_box_empty)
+                queued = True
+            except TimeoutException:
+                queued = False
+        
+            # If JavaScript was used, we might need to trigger send differently
+            if typed_via_js and not queued:
+                # For JavaScript-typed messages, try clicking send button as fallback
+                # (found and clicked from script - no per-selector lookups or actionability checks)
+                try:
+                    send_button = fast_wait(driver, 2, poll_frequency=0.1).until(
+                        lambda d: first_visible(d, SEND_BUTTON_CSS)
+                    )
+                    driver.execute_script("arguments[0].click();", send_button)
+                except WebDriverException:
+                    pass  # Enter key should have worked
+        
         except Exception as e:
-            # Fallback: Click first result
+            # Fallback: Use ActionChains (on a fresh message box if it went stale meanwhile)
+            message_box = refresh_if_stale(driver, message_box, max_retries=2) or message_box
             try:
-                first_result = WebDriverWait(driver, 5).until(
-                    EC.element_to_be_clickable((By.XPATH, "//div[@role='listitem'][1]"))
-                )
-                first_result.click()
-                time.sleep(1.5)  # Reduced from 2.5
+                ActionChains(driver).move_to_element(message_box).click().send_keys(Keys.ENTER).perform()
+                time.sleep(0.5)  # Reduced from 1
             except Exception as e2:
-                print(f"  ✗ Error: Could not select contact - {str(e2) if str(e2) else type(e2).__name__}")
+                print(f"  ✗ Error: Could not send message - {str(e2)}")
                 return False
-        
-        # Step 3: Find message box
-        print(f"  → Finding message box...")
-        time.sleep(0.5)  # Wait for chat to fully load (reduced from 1)
-        
-        # Find message box using multiple selectors
-        message_box = get_fresh_message_box(driver, max_retries=5)
-        if not message_box:
-            print(f"  ✗ Error: Could not find message box")
-            return False
+    
+    # Wait for the new outgoing bubble to get its first tick (up to 5s) instead of a fixed pause
+    if sent_before is not None:
+        try:
+            fast_wait(driver, 5, poll_frequency=0.1).until(
+                lambda d: (lambda state: state[0] > sent_before and state[1])(outgoing_state(d)))
+        except TimeoutException:
+            print(f"  ⚠️  Delivery tick not seen yet - continuing")
+    
+    return True
+
+
+def pause_between_contacts(driver, delay_seconds):
+    """
+    Wait out the delay between contacts, getting the page ready for the next contact first
+    
+    The main-page check and the wait for the chat-list search box run at the start of the
+    pause and are counted against it, so the next select_contact starts straight away and
+    only the remainder is slept. The pause is delay_seconds plus up to DELAY_JITTER more.
+    
+    Args:
+        driver: Selenium WebDriver instance
+        delay_seconds: Configured delay between contacts
+    """
+    end = time.monotonic() + delay_seconds * random.uniform(1, 1 + DELAY_JITTER)
+    
+    ensure_main_page(driver)
+    try:
+        fast_wait(driver, max(0.1, min(5, end - time.monotonic())), poll_frequency=0.2).until(
+            lambda d: any_visible(d, SEARCH_BOX_CSS))
+    except WebDriverException:
+        pass  # TimeoutException included - select_contact waits for it again anyway
+    
+    time.sleep(max(0, end - time.monotonic()))
+
+
+def send_whatsapp_message(driver, contact_number, message, delay_seconds=15, image_path=None):
+    """
+    Simple WhatsApp message sender:
+    1. Search contact
+    2. Auto select
+    3. Auto type message (or send image with caption if image_path provided)
+    4. Auto send
+    """
+    
+    try:
+        message_box = select_contact(driver, contact_number)
+        if not message_box:
+            return False
         
         # If image_path is provided, use image sending function instead
         if image_path:
             print(f"  📷 Sending image with caption...")
             if send_image_with_caption(driver, message_box, image_path, message, contact_number, delay_seconds):
                 print(f"✓ Message sent to {contact_number}")
-                time.sleep(delay_seconds)
-                # Go back to main page
-                ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-                time.sleep(0.2)
+                pause_between_contacts(driver, delay_seconds)
                 return True
             else:
                 # IMPORTANT (Mode 2): Never send caption as a separate text message if image send failed.
@@ -2085,244 +2504,244 @@ def send_whatsapp_message(driver, contact_number, message, delay_seconds=15, ima
                 try:
                     ActionChains(driver).send_keys(Keys.ESCAPE).perform()
                     time.sleep(0.5)
-                except:
+                except WebDriverException:
                     pass
                 return False
         
-        # Step 4: Auto type message
-        print(f"  → Typing message...")
-        
-        # Re-find message box to avoid stale element
-        message_box = get_fresh_message_box(driver, max_retries=3)
-        if not message_box:
-            print(f"  ✗ Error: Message box became unavailable")
+        if not send_text(driver, message_box, message):
             return False
         
-        # Focus message box - use ActionChains for reliable clicking
-        try:
-            ActionChains(driver).move_to_element(message_box).click().perform()
-            time.sleep(0.2)  # Reduced from 0.5
-        except Exception:
-            try:
-                message_box.click()
-                time.sleep(0.2)  # Reduced from 0.5
-            except Exception:
-                driver.execute_script("arguments[0].focus(); arguments[0].click();", message_box)
-                time.sleep(0.2)  # Reduced from 0.5
-        
-        # Check if message contains non-BMP characters (emojis, etc.)
-        # ChromeDriver send_keys() only supports BMP characters
-        has_non_bmp = any(ord(char) > 0xFFFF for char in message)
-        
-        if has_non_bmp:
-            # Use JavaScript for messages with emojis/special characters
-            print(f"  → Using JavaScript for emoji/special characters...")
-            # Clear first
-            driver.execute_script("arguments[0].innerHTML = ''; arguments[0].textContent = '';", message_box)
-            time.sleep(0.1)  # Reduced from 0.2
-            
-            # Use the set_message_text_js function
-            if not set_message_text_js(driver, message_box, message):
-                print(f"  ⚠ Warning: JavaScript text setting had issues, trying alternative...")
-                # Alternative: Direct JavaScript with proper newline handling
-                driver.execute_script("""
-                    var elem = arguments[0];
-                    var text = arguments[1];
-                    
-                    elem.focus();
-                    
-                    // Clear existing content
-                    var range = document.createRange();
-                    range.selectNodeContents(elem);
-                    var selection = window.getSelection();
-                    selection.removeAllRanges();
-                    selection.addRange(range);
-                    document.execCommand('delete', false, null);
-                    
-                    // Insert text with newlines preserved using insertText
-                    try {
-                        document.execCommand('insertText', false, text);
-                    } catch(e) {
-                        // Fallback: insert line by line
-                        var lines = text.split('\\n');
-                        for (var i = 0; i < lines.length; i++) {
-                            if (i > 0) {
-                                // Insert line break
-                                var br = document.createElement('br');
-                                elem.appendChild(br);
-                                var range = document.createRange();
-                                range.setStartAfter(br);
-                                range.collapse(true);
-                                var sel = window.getSelection();
-                                sel.removeAllRanges();
-                                sel.addRange(range);
-                            }
-                            if (lines[i]) {
-                                document.execCommand('insertText', false, lines[i]);
-                            }
-                        }
-                    }
-                    
-                    // Trigger proper input events
-                    var inputEvent = new InputEvent('input', {
-                        bubbles: true,
-                        cancelable: true,
-                        inputType: 'insertText',
-                        data: text
-                    });
-                    elem.dispatchEvent(inputEvent);
-                    
-                    var beforeInputEvent = new InputEvent('beforeinput', {
-                        bubbles: true,
-                        cancelable: true,
-                        inputType: 'insertText',
-                        data: text
-                    });
-                    elem.dispatchEvent(beforeInputEvent);
-                    
-                    elem.focus();
-                """, message_box, message)
-            time.sleep(0.4)  # Reduced from 0.8
-        else:
-            # Use real keyboard input for regular text (faster and more reliable)
-            # Clear any existing text
-            message_box.send_keys(Keys.CONTROL + "a")
-            time.sleep(0.1)  # Reduced from 0.2
-            message_box.send_keys(Keys.BACKSPACE)
-            time.sleep(0.1)  # Reduced from 0.3
-            
-            # Type message using real keyboard input
-            message_box.send_keys(message)
-            time.sleep(0.4)  # Wait for message to be fully typed (reduced from 0.8)
-        
-        # Step 5: Auto send
-        print(f"  → Sending message...")
-        
-        # Re-find message box to ensure it's fresh before sending
-        message_box = get_fresh_message_box(driver, max_retries=2)
-        if not message_box:
-            print(f"  ✗ Error: Could not find message box to send")
-            return False
-        
-        # Ensure message box is focused before sending
-        try:
-            message_box.click()
-            time.sleep(0.1)  # Reduced from 0.3
-            
-            # Try sending with Enter key
-            message_box.send_keys(Keys.ENTER)
-            time.sleep(0.5)  # Reduced from 1
-            
-            # Verify message was sent by checking if message box is empty
-            # If JavaScript was used, we might need to trigger send differently
-            if has_non_bmp:
-                # For JavaScript-typed messages, try clicking send button as fallback
-                try:
-                    send_button = WebDriverWait(driver, 2).until(
-                        EC.element_to_be_clickable((By.XPATH, "//span[@data-icon='send'] | //button[@aria-label='Send'] | //span[contains(@data-testid, 'send')]"))
-                    )
-                    send_button.click()
-                    time.sleep(0.5)  # Reduced from 1
-                except:
-                    pass  # Enter key should have worked
-            
-        except Exception as e:
-            # Fallback: Use ActionChains
-            try:
-                ActionChains(driver).move_to_element(message_box).click().send_keys(Keys.ENTER).perform()
-                time.sleep(0.5)  # Reduced from 1
-            except Exception:
-                # Last resort: Try JavaScript to trigger send
-                try:
-                    driver.execute_script("""
-                        var elem = arguments[0];
-                        var event = new KeyboardEvent('keydown', {
-                            key: 'Enter',
-                            code: 'Enter',
-                            keyCode: 13,
-                            which: 13,
-                            bubbles: true,
-                            cancelable: true
-                        });
-                        elem.dispatchEvent(event);
-                        elem.dispatchEvent(new KeyboardEvent('keyup', {
-                            key: 'Enter',
-                            code: 'Enter',
-                            keyCode: 13,
-                            bubbles: true
-                        }));
-                    """, message_box)
-                    time.sleep(0.5)  # Reduced from 1
-                except Exception as e2:
-                    print(f"  ✗ Error: Could not send message - {str(e2)}")
-                    return False
-        
-        time.sleep(1)  # Wait for message to be sent (reduced from 2)
-        
         print(f"✓ Message sent to {contact_number}")
-        time.sleep(delay_seconds)  # This is the main delay between contacts (user configurable)
-        
-        # Go back to main page
-        ActionChains(driver).send_keys(Keys.ESCAPE).perform()
-        time.sleep(0.2)  # Reduced from 0.5
+        pause_between_contacts(driver, delay_seconds)  # The main delay between contacts (user configurable)
         
+        # No Escape back to the main page: the chat-list search box stays usable with a chat open,
+        # so the next select_contact searches straight from here
         return True
         
     except TimeoutException as e:
         error_msg = str(e) if str(e) else "Timeout waiting for element"
         print(f"  ✗ Error: Timeout - {error_msg}")
+        _on_whatsapp_web.discard(driver.session_id)  # Re-check the page before the next contact
+        _open_chat.pop(driver.session_id, None)
         return False
     except Exception as e:
         error_msg = str(e) if str(e) else f"{type(e).__name__} (no message)"
         print(f"  ✗ Error: {error_msg}")
-        import traceback
         traceback.print_exc()
+        _on_whatsapp_web.discard(driver.session_id)
+        _open_chat.pop(driver.session_id, None)
         return False
 
 
-def send_bulk_messages(excel_file_path, delay_seconds=15, start_from=0, default_image=None):
+def chrome_profile_of(cmdline):
     """
-    Send messages to all contacts in the Excel file using Selenium
+    Normalized --user-data-dir of a Chrome command line, or None if it has none
+    """
+    for arg in cmdline or []:
+        if arg.startswith("--user-data-dir="):
+            return os.path.normcase(os.path.abspath(arg.split("=", 1)[1].strip('"')))
+    return None
+
+
+def kill_orphaned_chrome(profile_path):
+    """
+    Terminate leftovers of earlier runs before starting a new browser on the same profile:
+    Chrome processes whose --user-data-dir is exactly profile_path (they lock the profile and
+    make the new browser crash on startup), and the ChromeDriver that started them if the
+    script that owned it has exited. Browsers on other profiles (e.g. the other workers'
+    chrome_profile_N) and unrelated ChromeDrivers are never touched.
+    
+    Only called when no browser answers on the debugging port, so a browser kept open for
+    re-attaching is never touched. Does nothing if psutil is not installed.
     
     Args:
-        excel_file_path: Path to the XLSX file
-        delay_seconds: Delay between each message (to avoid rate limiting)
-        start_from: Index to start from (useful for resuming)
-        default_image: Optional path to a single image to send to ALL contacts (Mode 2)
-                      If None, only text messages are sent (Mode 1)
+        profile_path: Absolute Chrome user data directory
+    
+    Returns:
+        Number of processes terminated
     """
-    contacts = read_contacts_from_excel(excel_file_path)
+    if psutil is None:
+        return 0
     
-    if not contacts:
-        print("No contacts found. Please check your Excel file.")
-        return
+    profile = os.path.normcase(os.path.abspath(profile_path))
+    targets = {}
+    for proc in psutil.process_iter(['name', 'cmdline', 'ppid']):
+        try:
+            name = (proc.info['name'] or '').lower()
+            if not name.startswith('chrome') or name.startswith('chromedriver'):
+                continue
+            if chrome_profile_of(proc.info['cmdline']) != profile:
+                continue
+            targets[proc.pid] = proc
+            # The ChromeDriver that launched this browser, if its own script is gone
+            parent = proc.parent()
+            if parent is not None and (parent.name() or '').lower().startswith('chromedriver'):
+                if parent.ppid() in (0, 1) or not psutil.pid_exists(parent.ppid()):
+                    targets[parent.pid] = parent
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
     
-    # Check if default image exists (Mode 2)
-    if default_image:
-        excel_dir = os.path.dirname(os.path.abspath(excel_file_path))
-        if not os.path.isabs(default_image):
-            default_image = os.path.join(excel_dir, default_image)
-        if os.path.exists(default_image):
-            print(f"✓ Image found: {os.path.basename(default_image)}")
-            print(f"  📷 Mode 2: Will send image with caption to ALL contacts")
-        else:
-            print(f"⚠️  Image not found: {default_image}")
-            print(f"  ⚠️  Switching to Mode 1 (text only)")
-            default_image = None
-    else:
-        print(f"  📝 Mode 1: Text messages only (no images)")
+    killed = 0
+    for proc in targets.values():
+        try:
+            proc.terminate()
+            killed += 1
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
     
-    # Setup Chrome driver
-    print("\n🔧 Setting up Chrome browser...")
-    driver = None
+    if killed:
+        print(f"   Cleaned up {killed} leftover Chrome/ChromeDriver process(es) from an earlier run")
+    return killed
+
+
+def debugging_chrome_process(debugging_port):
+    """
+    The Chrome browser process started with --remote-debugging-port=debugging_port (its command
+    line is in .info['cmdline']), or None if there is none or psutil is not installed
+    """
+    if psutil is None:
+        return None
+    port_arg = f"--remote-debugging-port={debugging_port}"
+    for proc in psutil.process_iter(['name', 'cmdline']):
+        try:
+            name = (proc.info['name'] or '').lower()
+            if name.startswith('chrome') and not name.startswith('chromedriver') and \
+                    port_arg in (proc.info['cmdline'] or []):
+                return proc
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            continue
+    return None
+
+
+def chrome_major_version(profile_path):
+    """
+    Chrome major version, from the 'Last Version' file Chrome writes into the user data
+    directory on every start, or - for a profile that hasn't been used yet - from the
+    version-numbered folder next to the Chrome binary (no need to launch chrome --version)
     
+    Returns:
+        Major version string such as '120', or None if it can't be told without starting Chrome
+    """
     try:
+        with open(os.path.join(profile_path, "Last Version")) as f:
+            major = f.read().strip().split('.')[0]
+            if major:
+                return major
+    except OSError:
+        pass
+    
+    chrome_binary = find_chrome_binary()
+    if chrome_binary:
+        try:
+            with os.scandir(os.path.dirname(chrome_binary)) as entries:
+                versions = [entry.name for entry in entries
+                            if entry.is_dir() and re.match(r'^\d+\.\d+\.\d+\.\d+$', entry.name)]
+            if versions:
+                return str(max(int(v.split('.')[0]) for v in versions))
+        except OSError:
+            pass
+    return None
+
+
+def resolve_chromedriver_path(profile_path):
+    """
+    Return the ChromeDriver binary for this Chrome, skipping ChromeDriverManager's network
+    version check when a driver was already installed for the same Chrome major version
+    
+    The cache file maps each Chrome major version to its driver, so switching between Chrome
+    versions (or several profiles) doesn't trigger a new download each time.
+    
+    Args:
+        profile_path: Absolute Chrome user data directory (used to read the Chrome version)
+    
+    Returns:
+        Path to the ChromeDriver binary
+    """
+    chrome_major = chrome_major_version(profile_path)
+    cached = {}
+    try:
+        with open(CHROMEDRIVER_CACHE_FILE) as f:
+            cached = json.load(f)
+        if chrome_major and os.path.exists(cached.get(chrome_major, '')):
+            return cached[chrome_major]
+    except (OSError, ValueError):
+        cached = {}
+    
+    print("   Downloading/updating ChromeDriver...")
+    driver_path = ChromeDriverManager().install()
+    if chrome_major:
+        cached[chrome_major] = driver_path
+        # Temp file + atomic rename: worker threads restarting their browsers may write at once
+        tmp_path = f"{CHROMEDRIVER_CACHE_FILE}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(cached, f)
+            os.replace(tmp_path, CHROMEDRIVER_CACHE_FILE)
+        except OSError:
+            pass
+    return driver_path
+
+
+@functools.lru_cache(maxsize=1)
+def find_chrome_binary():
+    """
+    Locate chrome.exe on Windows (helps with some Windows issues); resolved once per run
+    
+    Returns:
+        Path to the Chrome binary, or None to let Selenium find it
+    """
+    if platform.system() != 'Windows':
+        return None
+    for chrome_path in CHROME_PATHS:
+        if os.path.exists(chrome_path):
+            return chrome_path
+    return None
+
+
+def create_chrome_driver(profile_dir="./chrome_profile", debugging_port=DEBUGGING_PORT, load_images=True):
+    """
+    Start Chrome with the given profile (or attach to one an earlier run left open on the same port)
+    
+    Args:
+        profile_dir: Chrome user data directory - each profile holds its own WhatsApp Web login
+        debugging_port: Remote debugging port for this browser
+        load_images: False to skip downloading images (avatars, chat media) - for text-only runs.
+                     A running browser that was started without images is not attached to when
+                     load_images is True: it is closed and started again with images
+    
+    Returns:
+        Selenium WebDriver instance (raises if Chrome could not be started)
+    """
+    debugger_address = f"127.0.0.1:{debugging_port}"
+    running = running_chrome_available(debugger_address)
+    if running and load_images:
+        # A browser left open by a text-only run has images turned off, which breaks image sending
+        if psutil is None:
+            print(f"   ⚠️  Can't tell whether the Chrome on {debugger_address} loads images (psutil not installed).")
+            print(f"      If it was left open by a text-only run, close it before sending images.")
+        else:
+            browser = debugging_chrome_process(debugging_port)
+            if browser is not None and IMAGES_OFF_ARG in (browser.info['cmdline'] or []):
+                print(f"   Chrome on {debugger_address} was started without images (text-only run) - restarting it")
+                try:
+                    browser.terminate()
+                    browser.wait(10)
+                except (psutil.NoSuchProcess, psutil.TimeoutExpired):
+                    pass
+                running = running_chrome_available(debugger_address)
+    
+    if running:
+        # Attach to the browser an earlier run left open (already loaded and logged in)
+        print(f"   Found Chrome already running on {debugger_address} - attaching to it")
+        chrome_options = webdriver.ChromeOptions()
+        chrome_options.add_experimental_option("debuggerAddress", debugger_address)
+    else:
         chrome_options = webdriver.ChromeOptions()
         
         # Use absolute path for user data directory (prevents crashes)
-        import platform
-        profile_path = os.path.abspath("./chrome_profile")
+        profile_path = os.path.abspath(profile_dir)
         chrome_options.add_argument(f"--user-data-dir={profile_path}")
+        kill_orphaned_chrome(profile_path)
         
         # Essential stability options
         chrome_options.add_argument("--no-sandbox")
@@ -2330,7 +2749,19 @@ def send_bulk_messages(excel_file_path, delay_seconds=15, start_from=0, default_
         chrome_options.add_argument("--disable-blink-features=AutomationControlled")
         chrome_options.add_argument("--disable-extensions")
         chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--remote-debugging-port=9222")
+        chrome_options.add_argument(f"--remote-debugging-port={debugging_port}")
+        
+        # Browser features a send-only session never uses
+        chrome_options.add_argument("--disable-background-networking")
+        chrome_options.add_argument("--disable-default-apps")
+        chrome_options.add_argument("--disable-sync")
+        chrome_options.add_argument("--mute-audio")
+        chrome_options.add_argument("--disable-features=Translate,MediaRouter")
+        
+        if HEADLESS:
+            chrome_options.add_argument("--headless=new")
+            # WhatsApp Web needs a desktop-sized viewport for its two-pane layout
+            chrome_options.add_argument("--window-size=1366,900")
         
         # Experimental options
         chrome_options.add_experimental_option("excludeSwitches", ["enable-logging", "enable-automation"])
@@ -2340,60 +2771,276 @@ def send_bulk_messages(excel_file_path, delay_seconds=15, start_from=0, default_
         # Prefs to prevent crashes
         prefs = {
             "profile.default_content_setting_values.notifications": 2,
+            "profile.default_content_setting_values.media_stream": 2,  # No camera/mic prompts
+            "profile.default_content_setting_values.geolocation": 2,
             "profile.default_content_settings.popups": 0,
-            "profile.managed_default_content_settings.images": 1
+            "profile.managed_default_content_settings.images": 1 if load_images else 2
         }
         chrome_options.add_experimental_option("prefs", prefs)
+        if not load_images:
+            # Text-only run: avatars and chat media are never looked at (the login QR is a canvas)
+            chrome_options.add_argument(IMAGES_OFF_ARG)
         
         # Try to set Chrome binary path explicitly (helps with some Windows issues)
-        if platform.system() == 'Windows':
-            chrome_paths = [
-                r'C:\Program Files\Google\Chrome\Application\chrome.exe',
-                r'C:\Program Files (x86)\Google\Chrome\Application\chrome.exe',
-                os.path.expanduser(r'~\AppData\Local\Google\Chrome\Application\chrome.exe')
-            ]
-            for chrome_path in chrome_paths:
-                if os.path.exists(chrome_path):
-                    chrome_options.binary_location = chrome_path
-                    print(f"   Using Chrome at: {chrome_path}")
-                    break
+        chrome_path = find_chrome_binary()
+        if chrome_path:
+            chrome_options.binary_location = chrome_path
+            print(f"   Using Chrome at: {chrome_path}")
+    
+    # Initialize driver with better error handling
+    try:
+        # Try with ChromeDriverManager first (skipped when the cached driver still matches Chrome)
+        driver_path = resolve_chromedriver_path(os.path.abspath(profile_dir))
+        
+        # Verify the driver file exists and is valid
+        if not os.path.exists(driver_path):
+            raise Exception(f"ChromeDriver not found at: {driver_path}")
         
-        # Initialize driver with better error handling
+        service = Service(driver_path)
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        print("   ✓ Chrome browser initialized successfully!")
+    except Exception as e:
+        print(f"   ⚠️  Error with ChromeDriverManager: {str(e)}")
+        print("   Trying alternative method (without explicit service)...")
         try:
-            # Try with ChromeDriverManager first
-            print("   Downloading/updating ChromeDriver...")
-            driver_path = ChromeDriverManager().install()
-            
-            # Verify the driver file exists and is valid
-            if not os.path.exists(driver_path):
-                raise Exception(f"ChromeDriver not found at: {driver_path}")
-            
-            service = Service(driver_path)
-            driver = webdriver.Chrome(service=service, options=chrome_options)
+            # Try without explicit service (let Selenium find it)
+            driver = webdriver.Chrome(options=chrome_options)
             print("   ✓ Chrome browser initialized successfully!")
-        except Exception as e:
-            print(f"   ⚠️  Error with ChromeDriverManager: {str(e)}")
-            print("   Trying alternative method (without explicit service)...")
-            try:
-                # Try without explicit service (let Selenium find it)
-                driver = webdriver.Chrome(options=chrome_options)
-                print("   ✓ Chrome browser initialized successfully!")
-            except Exception as e2:
-                print(f"   ✗ Failed to initialize Chrome: {str(e2)}")
-                print("\n   Troubleshooting steps:")
-                print("   1. Close all Chrome browser windows and try again")
-                print("   2. Make sure Chrome browser is installed and up to date")
-                print("   3. Delete Chrome profile and cache:")
-                print(f"      Remove-Item -Recurse -Force .\\chrome_profile")
-                print(f"      Remove-Item -Recurse -Force $env:USERPROFILE\\.wdm")
-                print("   4. Check if antivirus is blocking ChromeDriver")
-                print("   5. Try restarting your computer")
-                print("   6. Or manually download ChromeDriver from:")
-                print("      https://chromedriver.chromium.org/")
-                raise
+        except Exception as e2:
+            print(f"   ✗ Failed to initialize Chrome: {str(e2)}")
+            print("\n   Troubleshooting steps:")
+            print("   1. Close all Chrome browser windows and try again")
+            print("   2. Make sure Chrome browser is installed and up to date")
+            print("   3. Delete Chrome profile and cache:")
+            print(f"      Remove-Item -Recurse -Force {profile_dir}")
+            print(f"      Remove-Item -Recurse -Force $env:USERPROFILE\\.wdm")
+            print("   4. Check if antivirus is blocking ChromeDriver")
+            print("   5. Try restarting your computer")
+            print("   6. Or manually download ChromeDriver from:")
+            print("      https://chromedriver.chromium.org/")
+            raise
+    
+    # Always stop this run's ChromeDriver on exit (Ctrl+C included); with detach=True the
+    # browser itself stays open and can be re-attached next time
+    atexit.register(driver.service.stop)
+    
+    # No implicit wait: every find_* in this module is immediate (many probe for absence, e.g.
+    # "preview gone"), and waits that are actually needed use an explicit WebDriverWait
+    driver.implicitly_wait(0)
+    return driver
+
+
+def sheet_signature(excel_file_path):
+    """
+    Identify an Excel file by absolute path, modification time and size, so a checkpoint is not
+    applied to a different sheet saved under the same name
+    """
+    stat = os.stat(excel_file_path)
+    return [os.path.abspath(excel_file_path), int(stat.st_mtime), stat.st_size]
+
+
+def save_progress(excel_file_path, done, successful, failed):
+    """
+    Checkpoint the run to PROGRESS_FILE (written to a temp file, then atomically renamed over it)
+    
+    Args:
+        excel_file_path: Path to the XLSX file being sent
+        done: Set of row indexes already sent (failed rows are left out, so a resume retries them)
+        successful: Messages sent so far in this run
+        failed: Messages failed so far in this run
+    """
+    tmp_path = PROGRESS_FILE + ".tmp"
+    try:
+        data = {
+            'sheet': sheet_signature(excel_file_path),
+            'done': sorted(done),
+            'successful': successful,
+            'failed': failed
+        }
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, PROGRESS_FILE)
+    except OSError as e:
+        print(f"  ⚠️  Could not save progress: {str(e)}")
+
+
+def load_progress(excel_file_path):
+    """
+    Read the checkpoint left by an unfinished run on the same, unchanged Excel file
+    
+    Returns:
+        Set of row indexes already sent, empty if there is nothing to resume
+    """
+    try:
+        with open(PROGRESS_FILE) as f:
+            data = json.load(f)
+        if data.get('sheet') == sheet_signature(excel_file_path):
+            return set(int(i) for i in data.get('done', []))
+    except (OSError, ValueError, TypeError):
+        pass
+    return set()
+
+
+def clear_progress():
+    """
+    Delete the checkpoint (the run finished, or the user asked to start over)
+    """
+    try:
+        os.remove(PROGRESS_FILE)
+    except OSError:
+        pass
+
+
+def send_contacts(driver, contacts, delay_seconds, default_image=None, total=None, progress=None,
+                  checkpoint=None, lock=None):
+    """
+    Send to (index, contact) pairs through one logged-in driver
+    
+    Args:
+        driver: Selenium WebDriver instance on the WhatsApp Web main page
+        contacts: Iterable of (index, Contact) pairs (may be a generator streaming from the sheet)
+        delay_seconds: Delay between each message
+        default_image: Optional image sent to every contact (Mode 2)
+        total: Total number of contacts in the run (for the [i/total] prefix); None if unknown
+        progress: Optional dict with 'successful'/'failed' counters, updated as messages go out
+        checkpoint: Optional callable(index) run with the row index of each contact sent successfully
+        lock: Optional lock held while updating progress and checkpointing (shared by worker threads)
+    
+    Returns:
+        Tuple (successful, failed)
+    """
+    progress = progress if progress is not None else {'successful': 0, 'failed': 0}
+    lock = lock or contextlib.nullcontext()
+    of_total = f"/{total}" if total else ""  # Count unknown: just the running number
+    successful = 0
+    failed = 0
+    
+    for index, contact in contacts:
+        print(f"\n[{index + 1}{of_total}] Sending to {contact.number}...")
+        
+        # Send message (with image if available, text-only if default_image is None)
+        sent = send_whatsapp_message(driver, contact.number, contact.message, delay_seconds, default_image)
+        with lock:
+            if sent:
+                successful += 1
+                progress['successful'] += 1
+            else:
+                failed += 1
+                progress['failed'] += 1
+            done = progress['successful'] + progress['failed']
+            if checkpoint and sent:
+                checkpoint(index)
+        
+        # Progress update every 10 messages
+        if done % 10 == 0:
+            print(f"\n📊 Progress: {done}{of_total} | ✓ {progress['successful']} | ✗ {progress['failed']}")
+    
+    return successful, failed
+
+
+def send_bulk_messages(excel_file_path, delay_seconds=15, start_from=0, default_image=None, num_workers=1,
+                       resume=True):
+    """
+    Send messages to all contacts in the Excel file using Selenium
+    
+    Args:
+        excel_file_path: Path to the XLSX file
+        delay_seconds: Delay between each message (to avoid rate limiting)
+        start_from: Index to start from (useful for resuming)
+        default_image: Optional path to a single image to send to ALL contacts (Mode 2)
+                      If None, only text messages are sent (Mode 1)
+        num_workers: Number of Chrome browsers sending in parallel (default 1). Each extra browser
+                     uses its own profile (chrome_profile_<n>) and needs its own WhatsApp Web login
+        resume: Skip the contacts an earlier run on this same, unchanged file already sent (see
+                PROGRESS_FILE); contacts that failed are sent again. False discards that checkpoint
+                and starts from start_from
+    """
+    # Rows are streamed from the sheet as they are sent rather than loaded up front;
+    # peek at the first one to catch an empty or unreadable file before starting Chrome
+    rows = iter_contacts(excel_file_path)
+    try:
+        first = next(rows, None)
+    except Exception:
+        return  # Already reported by iter_contacts
+    
+    if first is None:
+        print("No contacts found. Please check your Excel file.")
+        return
+    contacts = itertools.chain([first], rows)
+    total = count_contacts(excel_file_path)
+    if total:
+        print(f"✓ Loaded {total} contacts from {excel_file_path}")
+    else:
+        print(f"✓ Reading contacts from {excel_file_path} (count unknown)")
+    
+    # Pick up where an interrupted run on this file stopped (or retry the contacts it failed)
+    done = set()
+    if resume:
+        done = load_progress(excel_file_path)
+        if done:
+            print(f"↻ Resuming: skipping {len(done)} contact(s) already sent by an earlier run "
+                  f"({PROGRESS_FILE} - set RESUME = False to start over)")
+    else:
+        clear_progress()
+    progress = {'successful': 0, 'failed': 0}
     
+    def _checkpoint(index):
+        # Called under the workers' progress lock in multi-browser runs
+        done.add(index)
+        save_progress(excel_file_path, done, progress['successful'], progress['failed'])
+    
+    def _finish():
+        # Nothing left to resume - unless some contacts failed: keep the checkpoint for those
+        if progress['failed']:
+            print(f"↻ The next run on this file retries the {progress['failed']} failed contact(s) "
+                  f"(set RESUME = False to start over)")
+        else:
+            clear_progress()
+    
+    # Check if default image exists (Mode 2)
+    if default_image:
+        excel_dir = os.path.dirname(os.path.abspath(excel_file_path))
+        if not os.path.isabs(default_image):
+            default_image = os.path.join(excel_dir, default_image)
+        if os.path.exists(default_image):
+            print(f"✓ Image found: {os.path.basename(default_image)}")
+            print(f"  📷 Mode 2: Will send image with caption to ALL contacts")
+        else:
+            print(f"⚠️  Image not found: {default_image}")
+            print(f"  ⚠️  Switching to Mode 1 (text only)")
+            default_image = None
+    else:
+        print(f"  📝 Mode 1: Text messages only (no images)")
+    
+    # Setup Chrome driver
+    print("\n🔧 Setting up Chrome browser...")
+    
+    pending = itertools.islice(enumerate(contacts), start_from, None)
+    if num_workers > 1:
+        # The shared work queue needs every contact up front
+        try:
+            pending = list(pending)
+        except Exception:
+            # Reported by iter_contacts; the checkpoint is kept for the next run
+            print("✗ Stopped before sending: the Excel file could not be read to the end")
+            return
+        finally:
+            rows.close()
+        total = start_from + len(pending)
+        pending = [job for job in pending if job[0] not in done]
+        if send_with_workers(pending, total, delay_seconds, default_image, num_workers,
+                             progress=progress, checkpoint=_checkpoint):
+            _finish()
+        return
+    pending = (job for job in pending if job[0] not in done)
+    
+    driver = None
+    
+    try:
+        driver = create_chrome_driver(load_images=bool(default_image))
     except Exception as e:
         print(f"\n✗ Could not start Chrome browser: {str(e)}")
+        rows.close()
         return
     
     try:
@@ -2406,7 +3053,7 @@ def send_bulk_messages(excel_file_path, delay_seconds=15, start_from=0, default_
         ensure_main_page(driver)
         time.sleep(1)
         
-        print(f"\n📱 Starting to send messages to {len(contacts)} contacts...")
+        print(f"\n📱 Starting to send messages to {total or 'the'} contacts in {os.path.basename(excel_file_path)}...")
         print(f"⏱️  Delay between messages: {delay_seconds} seconds")
         
         # Determine mode
@@ -2418,58 +3065,168 @@ def send_bulk_messages(excel_file_path, delay_seconds=15, start_from=0, default_
         
         print(f"⚠️  Keep the browser window open and don't close it!\n")
         
-        successful = 0
-        failed = 0
-        
-        for index, contact in enumerate(contacts[start_from:], start=start_from):
-            print(f"\n[{index + 1}/{len(contacts)}] Sending to {contact['number']}...")
-            
-            # Determine image path based on mode
-            if default_image:
-                # Mode 2: Photo with caption (same photo for all)
-                image_path = default_image
-                if index == start_from:  # Only print once
-                    print(f"  📷 Using image: {os.path.basename(image_path)}")
-            else:
-                # Mode 1: Text messages only
-                image_path = None
-            
-            # Send message (with image if available, text-only if image_path is None)
-            if send_whatsapp_message(driver, contact['number'], contact['message'], delay_seconds, image_path):
-                successful += 1
-            else:
-                failed += 1
-            
-            # Progress update every 10 messages
-            if (index + 1) % 10 == 0:
-                print(f"\n📊 Progress: {index + 1}/{len(contacts)} | ✓ {successful} | ✗ {failed}")
+        successful, failed = send_contacts(driver, pending, delay_seconds, default_image,
+                                           total=total, progress=progress, checkpoint=_checkpoint)
         
         print(f"\n{'='*50}")
         print(f"✅ Completed!")
         print(f"✓ Successful: {successful}")
         print(f"✗ Failed: {failed}")
         print(f"{'='*50}")
+        _finish()
         
     except KeyboardInterrupt:
         print("\n\n⚠️  Process interrupted by user")
-        print(f"   You can resume from index {start_from + successful + failed} next time")
+        print(f"   Progress saved - the next run on this file skips the {len(done)} contact(s) already sent")
     except Exception as e:
         print(f"\n✗ Error: {str(e)}")
     finally:
+        rows.close()  # Closes the workbook if the run stopped before the last row
         if driver:
             print("\n⚠️  Closing browser in 5 seconds... (Press Ctrl+C to keep it open)")
             try:
                 time.sleep(5)
                 driver.quit()
-            except:
+            except (KeyboardInterrupt, WebDriverException):  # Ctrl+C keeps the browser open
                 pass
 
 
+def send_with_workers(pending, total, delay_seconds, default_image, num_workers, progress=None, checkpoint=None):
+    """
+    Send contacts from a shared queue through several Chrome browsers, each in its own thread
+    
+    Worker 0 uses the usual chrome_profile and debugging port; worker n uses chrome_profile_<n>
+    and port DEBUGGING_PORT + n, so every browser keeps its own WhatsApp Web login. A browser is
+    restarted on its profile (no new login needed) after DRIVER_MAX_USES contacts, or when its
+    session dies.
+    
+    Args:
+        pending: List of (index, Contact) pairs still to send
+        total: Total number of contacts in the run
+        delay_seconds: Delay between messages, per browser
+        default_image: Optional image sent to every contact (Mode 2)
+        num_workers: Number of browsers
+        progress: Optional dict with 'successful'/'failed' counters, updated as messages go out
+        checkpoint: Optional callable(index) run (under the progress lock) after every contact
+    
+    Returns:
+        True if every contact was handled, False if the run stopped early
+    """
+    drivers = []
+    
+    def _start(i):
+        profile_dir = "./chrome_profile" if i == 0 else f"./chrome_profile_{i}"
+        driver = create_chrome_driver(profile_dir, DEBUGGING_PORT + i, load_images=bool(default_image))
+        try:
+            if not init_whatsapp_web(driver):
+                raise RuntimeError(f"Browser {i + 1} could not log in to WhatsApp Web")
+            ensure_main_page(driver)
+        except BaseException:
+            driver.quit()
+            raise
+        return driver
+    
+    print(f"   Starting {num_workers} browsers - scan the QR code in each one that isn't logged in yet")
+    try:
+        for i in range(num_workers):
+            drivers.append(_start(i))
+    except Exception as e:
+        print(f"\n✗ Could not start Chrome browser: {str(e)}")
+        return False
+    finally:
+        # A login failure (or Ctrl+C while waiting for a QR scan) quits the browsers already started
+        if len(drivers) < num_workers:
+            for driver in drivers:
+                try:
+                    driver.quit()
+                except WebDriverException:
+                    pass
+    
+    print(f"\n📱 Starting to send messages to {len(pending)} contacts with {num_workers} browsers...")
+    print(f"⏱️  Delay between messages: {delay_seconds} seconds (per browser)")
+    
+    # Workers pull from one queue, so a browser held up by a slow contact doesn't hold back the rest
+    jobs = queue.Queue()
+    for job in pending:
+        jobs.put(job)
+    
+    def _alive(driver):
+        try:
+            driver.execute_script("return 1;")
+            return True
+        except WebDriverException:
+            return False
+    
+    def _worker(i):
+        uses_remaining = DRIVER_MAX_USES
+        while not stop.is_set():
+            try:
+                job = jobs.get_nowait()
+            except queue.Empty:
+                return
+            successful, _ = send_contacts(drivers[i], [job], delay_seconds, default_image, total=total,
+                                          progress=progress, checkpoint=checkpoint, lock=progress_lock)
+            if stop.is_set():
+                return  # Stopping: don't start a new browser (its login could wait for a QR scan)
+            uses_remaining -= 1
+            if uses_remaining <= 0 or (not successful and not _alive(drivers[i])):
+                print(f"  → Restarting browser {i + 1}...")
+                try:
+                    drivers[i].quit()
+                except WebDriverException:
+                    pass
+                try:
+                    drivers[i] = _start(i)
+                except Exception as e:
+                    print(f"  ✗ Browser {i + 1} could not be restarted: {str(e)}")
+                    return
+                uses_remaining = DRIVER_MAX_USES
+    
+    progress = progress if progress is not None else {'successful': 0, 'failed': 0}
+    progress_lock = threading.Lock()
+    stop = threading.Event()  # Set on Ctrl+C: workers finish their current contact and take no more
+    pool = ThreadPoolExecutor(max_workers=num_workers)
+    try:
+        for _ in pool.map(_worker, range(num_workers)):
+            pass
+        pool.shutdown()
+        
+        print(f"\n{'='*50}")
+        print(f"✅ Completed!")
+        print(f"✓ Successful: {progress['successful']}")
+        print(f"✗ Failed: {progress['failed']}")
+        if not jobs.empty():
+            print(f"⚠️  Not sent (no browser left): {jobs.qsize()}")
+        print(f"{'='*50}")
+        return jobs.empty()
+    except KeyboardInterrupt:
+        stop.set()
+        print("\n\n⚠️  Process interrupted by user - finishing the contacts being sent...")
+        # Wait for the workers before the browsers are quit below, so no send is cut off half-way
+        pool.shutdown(wait=True)
+        if checkpoint:
+            print(f"   Progress saved - the next run on this file skips the contacts already sent")
+    except Exception as e:
+        stop.set()
+        print(f"\n✗ Error: {str(e)}")
+        pool.shutdown(wait=True)
+    finally:
+        print("\n⚠️  Closing browsers in 5 seconds... (Press Ctrl+C to keep them open)")
+        try:
+            time.sleep(5)
+            for driver in drivers:
+                driver.quit()
+        except (KeyboardInterrupt, WebDriverException):  # Ctrl+C keeps the browsers open
+            pass
+
+
 if __name__ == "__main__":
     # Configuration
     EXCEL_FILE = "contacts.xlsx"  # Change this to your Excel file name
     DELAY_SECONDS = 2  # Delay between messages (reduced for faster sending, increase if you get rate limited)
     START_FROM = 0  # Start from this index (useful if you need to resume)
+    RESUME = True  # Skip contacts an earlier run on this same file already sent (.progress.json); False starts over
+    NUM_WORKERS = 1  # Chrome browsers sending in parallel; each extra one needs its own WhatsApp login (chrome_profile_<n>)
     
     # IMAGE CONFIGURATION - Interactive Mode Selection
     print("\n" + "="*50)
@@ -2533,6 +3290,8 @@ if __name__ == "__main__":
     print("="*50)
     print(f"File: {EXCEL_FILE}")
     print(f"Delay: {DELAY_SECONDS} seconds between messages")
+    if NUM_WORKERS > 1:
+        print(f"Browsers: {NUM_WORKERS} (scan a QR code in each new one)")
     print("\n⚠️  Make sure:")
     print("  1. You have Chrome browser installed")
     print("  2. Your computer won't go to sleep")
@@ -2542,7 +3301,8 @@ if __name__ == "__main__":
     
     try:
         input()
-        send_bulk_messages(EXCEL_FILE, DELAY_SECONDS, START_FROM, DEFAULT_IMAGE)
+        send_bulk_messages(EXCEL_FILE, DELAY_SECONDS, START_FROM, DEFAULT_IMAGE, num_workers=NUM_WORKERS,
+                           resume=RESUME)
     except KeyboardInterrupt:
         print("\n\n⚠️  Process cancelled by user")
     except Exception as e: